@@ -2,8 +2,16 @@
 import os
 import streamlit as st
 from dotenv import load_dotenv
-from resume_generator import generate_resume
-from pdf_util import generate_resume_pdf
+from resume_generator import generate_resume, generate_resume_variants
+from llm_backend import get_usage_stats
+from pdf_util import generate_resume_pdf, COMPACT_DEFAULT
+from render_pool import RenderPool
+from artifact_store import PdfArtifactStore
+from ats_score import JobIndex, split_pasted
+from profiling import profile_request
+from resume_importer import import_resume_async, ResumeImportError, IMPORT_TIMEOUT_S
+from concurrent.futures import TimeoutError as FutureTimeout
+import hashlib
 import json
 
 # Load environment variables
@@ -12,32 +20,86 @@ load_dotenv(override=False)
 st.set_page_config(page_title="AI Resume Builder", page_icon="🧠", layout="centered")
 st.title("🤖 AI Resume Builder Chatbot")
 
-# Check API Key
+# Check API Key (not needed for the offline "local" / "stub" backends)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-if not OPENAI_API_KEY:
+if not OPENAI_API_KEY and os.getenv("LLM_BACKEND", "openai").lower() == "openai":
     st.error("OpenAI API key not found. Add it in your .env file as OPENAI_API_KEY.")
     st.stop()
 
+# Optional warm render processes (PDF_RENDER_WORKERS > 0), shared by all sessions
+@st.cache_resource
+def get_render_pool():
+    workers = int(os.getenv("PDF_RENDER_WORKERS", "0"))
+    return RenderPool(workers=workers) if workers > 0 else None
+
+# Rendered PDFs on disk, so reruns and repeat downloads skip re-rendering
+@st.cache_resource
+def get_pdf_store():
+    return PdfArtifactStore()
+
+# ?profile=1 captures profiles for this session's generation and rendering.
+# Captures write the visitor's input to disk, so the flag needs PROFILE_ALLOW_QUERY=1.
+PROFILE_ALLOW_QUERY = os.getenv("PROFILE_ALLOW_QUERY", "0").lower() in ("1", "true", "yes")
+profile_flag = PROFILE_ALLOW_QUERY and st.query_params.get("profile") == "1"
+
+def render_pdf(resume_text):
+    pool = get_render_pool()
+    theme = "compact" if COMPACT_DEFAULT else "default"
+    if profile_flag:
+        # render in-process so the capture sees it (store hits are not re-rendered)
+        pool = None
+    with profile_request(profile_flag):
+        return get_pdf_store().get_bytes(resume_text, theme, render=pool.render if pool else generate_resume_pdf)
+
 # Maintain session
 if "generated_resume" not in st.session_state:
     st.session_state.generated_resume = None
+if "resume_variants" not in st.session_state:
+    st.session_state.resume_variants = {}
+if "all_skills" not in st.session_state:
+    st.session_state.all_skills = {}
+if "prefill" not in st.session_state:
+    st.session_state.prefill = {}
+    st.session_state.prefill_hash = None
+
+# -------------------- IMPORT EXISTING RESUME --------------------
+uploaded = st.file_uploader("📎 Import an existing resume PDF to prefill the form (optional)", type=["pdf"])
+if uploaded is not None:
+    upload_bytes = uploaded.getvalue()
+    upload_hash = hashlib.sha256(upload_bytes).hexdigest()
+    if upload_hash != st.session_state.prefill_hash:
+        try:
+            with st.spinner("📖 Reading your resume..."):
+                # Extraction runs on a background pool; this thread only waits
+                fields = import_resume_async(upload_bytes).result(timeout=IMPORT_TIMEOUT_S + 2)
+            st.session_state.prefill = fields
+            st.session_state.prefill_hash = upload_hash
+            st.success(f"✅ Imported {fields['pages_read']} page(s). Review the fields below.")
+        except (ResumeImportError, FutureTimeout) as e:
+            st.session_state.prefill_hash = upload_hash
+            st.warning(f"Could not import this PDF: {str(e) or 'timed out'}")
+
+prefill = st.session_state.prefill
 
 # -------------------- INPUT FORM --------------------
 with st.form("resume_form"):
     st.subheader("📋 Enter Your Details")
-    name = st.text_input("Full Name")
-    contact = st.text_input("Contact Number (optional)")
-    email = st.text_input("Email Address")
-    linkedin = st.text_input("LinkedIn URL (optional)")
-    github = st.text_input("GitHub URL (optional)")
-    portfolio = st.text_input("Portfolio URL (optional)")
-    target_role = st.text_input("🎯 Target Job Role (e.g., Software Developer)")
-
-    education = st.text_area("🎓 Education (degree, institute, dates)")
-    experience = st.text_area("💼 Experience (company, role, dates, bullets)")
-    projects = st.text_area("🚀 Projects (title, short description, tools — use [Title](https://...) for links)")
-    skills = st.text_area("🧠 Technical Skills (comma separated)")
-    achievements = st.text_area("🏆 Achievements / Certifications (optional)")
+    name = st.text_input("Full Name", value=prefill.get("name", ""))
+    contact = st.text_input("Contact Number (optional)", value=prefill.get("contact", ""))
+    email = st.text_input("Email Address", value=prefill.get("email", ""))
+    linkedin = st.text_input("LinkedIn URL (optional)", value=prefill.get("linkedin", ""))
+    github = st.text_input("GitHub URL (optional)", value=prefill.get("github", ""))
+    portfolio = st.text_input("Portfolio URL (optional)", value=prefill.get("portfolio", ""))
+    # stripped once: generate_resume_variants keys its result by stripped role names
+    target_role = st.text_input("🎯 Target Job Role (e.g., Software Developer)", value=prefill.get("target_role", "")).strip()
+    extra_roles = st.text_input("🎯 Also tailor for these roles (optional, comma separated)")
+
+    education = st.text_area("🎓 Education (degree, institute, dates)", value=prefill.get("education", ""))
+    experience = st.text_area("💼 Experience (company, role, dates, bullets)", value=prefill.get("experience", ""))
+    projects = st.text_area("🚀 Projects (title, short description, tools — use [Title](https://...) for links)",
+                            value=prefill.get("projects", ""))
+    skills = st.text_area("🧠 Technical Skills (comma separated)", value=prefill.get("skills", ""))
+    achievements = st.text_area("🏆 Achievements / Certifications (optional)", value=prefill.get("achievements", ""))
 
     submitted = st.form_submit_button("Generate Resume")
 
@@ -82,16 +144,36 @@ if submitted:
             }
 
             try:
-                resume_text = generate_resume(user_data)
-                # Clean markdown fences if model returns them
-                resume_text = resume_text.replace("```markdown", "").replace("```", "").strip()
+                roles = [target_role] + [r.strip() for r in extra_roles.split(",") if r.strip()]
+                details = {}
+                with profile_request(profile_flag):
+                    if len(roles) > 1:
+                        # Shared stages run once; per-role LLM calls run concurrently
+                        variants = generate_resume_variants(user_data, roles, details)
+                    else:
+                        details[target_role] = {}
+                        variants = {target_role: generate_resume(user_data, details[target_role])}
 
-                header_line = build_header(name, target_role, contact, email, linkedin, github, portfolio)
-                if header_line not in resume_text:
-                    resume_text = header_line + "\n\n" + resume_text
+                cleaned = {}
+                for role, resume_text in variants.items():
+                    # Clean markdown fences if model returns them
+                    resume_text = resume_text.replace("```markdown", "").replace("```", "").strip()
 
-                st.session_state.generated_resume = resume_text
+                    header_line = build_header(name, role, contact, email, linkedin, github, portfolio)
+                    if header_line not in resume_text:
+                        resume_text = header_line + "\n\n" + resume_text
+                    cleaned[role] = resume_text
+
+                st.session_state.generated_resume = cleaned[target_role]
+                st.session_state.resume_variants = {r: t for r, t in cleaned.items() if r != target_role}
+                st.session_state.all_skills = {r: d.get("all_skills", skills) for r, d in details.items()}
+                st.session_state.target_role = target_role
                 st.success("✅ Resume generated successfully!")
+                usage = get_usage_stats()
+                st.caption(
+                    f"LLM usage since server start: {usage['prompt_tokens']} prompt tokens, "
+                    f"{usage['cached_tokens']} served from the prompt cache ({usage['cache_hit_ratio']:.0%})"
+                )
             except Exception as e:
                 st.error("Error generating resume.")
                 st.exception(e)
@@ -118,7 +200,7 @@ if st.session_state.generated_resume:
             pdf_data = None
 
             if st.button("Generate Final PDF"):
-                pdf_data = generate_resume_pdf(edited_resume)
+                pdf_data = render_pdf(edited_resume)
                 st.download_button(
                     label="📄 Download Final Resume (PDF)",
                     data=pdf_data,
@@ -144,6 +226,68 @@ if st.session_state.generated_resume:
     else:
         st.warning("Resume text is empty — cannot generate PDF.")
 
+# -------------------- ROLE VARIANTS --------------------
+if st.session_state.resume_variants:
+    st.markdown("### 🎯 Role Variants")
+    for role, variant_text in st.session_state.resume_variants.items():
+        pdf_bytes = render_pdf(variant_text)
+        with st.expander(role):
+            st.markdown(st.session_state.resume_variants[role], unsafe_allow_html=True)
+            st.download_button(
+                label=f"📄 Download {role} Resume (PDF)",
+                data=pdf_bytes,
+                file_name=f"{name.replace(' ', '_')}_{role.replace(' ', '_')}_resume.pdf",
+                mime="application/pdf",
+                key=f"variant_{role}",
+            )
+
+# -------------------- ATS MATCH --------------------
+@st.cache_resource(max_entries=8)
+def get_job_index(postings_text):
+    titles, texts = split_pasted(postings_text)
+    return JobIndex(texts, titles) if texts else None
+
+if st.session_state.generated_resume:
+    with st.expander("📊 ATS Match Against Job Postings"):
+        postings_text = st.text_area("Paste job descriptions (separate postings with a line of ---)", height=200)
+        postings_file = st.file_uploader("…or upload postings (.txt separated by ---, or .jsonl)", type=["txt", "jsonl"])
+        if postings_file is not None:
+            raw = postings_file.getvalue().decode("utf-8", errors="replace")
+            if postings_file.name.endswith(".jsonl"):
+                rows, bad = [], 0
+                for ln in raw.splitlines():
+                    if not ln.strip():
+                        continue
+                    try:
+                        row = json.loads(ln)
+                    except json.JSONDecodeError:
+                        row = None
+                    if isinstance(row, dict):
+                        rows.append(row)
+                    else:
+                        bad += 1
+                if bad:
+                    st.warning(f"Skipped {bad} line(s) of {postings_file.name} that are not JSON objects.")
+                raw = "\n---\n".join(f"{r.get('title', '')}\n{r.get('description') or r.get('text', '')}" for r in rows)
+            postings_text = (postings_text + "\n---\n" + raw) if postings_text.strip() else raw
+        index = get_job_index(postings_text) if postings_text.strip() else None
+        if postings_text.strip() and index is None:
+            st.info("No job postings found. Separate postings with a line of ---.")
+        if index is not None:
+            role = st.session_state.get("target_role", "")
+            all_skills = st.session_state.all_skills.get(role, "")
+            results = index.score(st.session_state.generated_resume, all_skills, top_k=50)
+            st.caption(f"Scored against {index.n_docs} posting(s); best matches first.")
+            for r in results:
+                st.markdown(
+                    f"**{r['title']}** — similarity {r['similarity']:.2f}, "
+                    f"keyword coverage {r['coverage']:.0%}"
+                )
+                if r["missing_skills"]:
+                    st.markdown("  - Your skills missing from the resume: " + ", ".join(r["missing_skills"]))
+                if r["missing_keywords"]:
+                    st.markdown("  - Other keywords in the posting: " + ", ".join(r["missing_keywords"]))
+
 st.markdown("---")
 st.caption("Built with Streamlit + OpenAI + ReportLab")
 
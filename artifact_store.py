@@ -0,0 +1,200 @@
+# artifact_store.py — on-disk PDF cache keyed by rendered-content hash
+"""
+Streamlit reruns and repeated downloads keep re-rendering the same resume.
+PdfArtifactStore maps sha256(normalised resume text, theme, renderer version)
+to a PDF on disk and serves repeats straight from the file.
+
+Layout under the store directory:
+  blobs/<sha256 of PDF bytes>.pdf   content-addressed, so identical outputs are stored once
+  keys/<sha256 of render key>       small pointer file naming the blob
+
+Blobs are evicted least-recently-used (by mtime, refreshed on every hit) once
+the total exceeds `max_bytes`, down to 90% of it so the directory scan is not
+repeated on every put. The total is tracked in memory between scans. Key files
+are touched with their blob, so the same pass drops key files no newer than the
+last evicted blob (by mtime, without opening them); a key that still slips
+through is dropped when looked up. Writes go through a temp file + rename, so
+several processes can share one directory.
+
+  PDF_STORE_DIR      store directory (default .pdf_store)
+  PDF_STORE_MAX_MB   size bound in MiB (default 256)
+"""
+import os
+import hashlib
+import tempfile
+import threading
+
+from pdf_util import RENDERER_VERSION, generate_resume_pdf
+
+
+def _normalise(text: str) -> str:
+    lines = (text or "").replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(ln.rstrip() for ln in lines).strip()
+
+
+def render_key(resume_text: str, theme: str = "default") -> str:
+    h = hashlib.sha256()
+    for part in (RENDERER_VERSION, theme, _normalise(resume_text)):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class PdfArtifactStore:
+    """
+    Size-bounded, content-deduplicated PDF cache on local disk.
+    """
+
+    def __init__(self, root=None, max_bytes=None):
+        self.root = root or os.getenv("PDF_STORE_DIR", ".pdf_store")
+        self.max_bytes = int(max_bytes if max_bytes is not None
+                             else float(os.getenv("PDF_STORE_MAX_MB", "256")) * 1024 * 1024)
+        self._blobs = os.path.join(self.root, "blobs")
+        self._keys = os.path.join(self.root, "keys")
+        os.makedirs(self._blobs, exist_ok=True)
+        os.makedirs(self._keys, exist_ok=True)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "bytes_saved": 0, "deduplicated": 0, "evictions": 0,
+                       "rerendered": 0}
+        self._total = self._scan()[1]   # other processes may add blobs; rescanned before evicting
+
+    # -- lookup ---------------------------------------------------------------
+
+    def get_path(self, resume_text: str, theme: str = "default"):
+        """
+        Path of the stored PDF for this text/theme, or None.
+        """
+        key_file = os.path.join(self._keys, render_key(resume_text, theme))
+        try:
+            with open(key_file, encoding="utf-8") as f:
+                blob = os.path.join(self._blobs, f.read().strip())
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(blob)
+        except FileNotFoundError:
+            # blob was evicted: drop the stale key now
+            try:
+                os.remove(key_file)
+            except FileNotFoundError:
+                pass
+            return None
+        try:
+            os.utime(key_file)
+        except FileNotFoundError:
+            pass
+        return blob
+
+    def get_or_render(self, resume_text: str, theme: str = "default", render=None) -> str:
+        """
+        Path of the PDF for this text, rendering and storing it on a miss.
+        `render` takes the text and returns PDF bytes (default generate_resume_pdf).
+        """
+        path = self.get_path(resume_text, theme)
+        if path is not None:
+            with self._lock:
+                self._stats["hits"] += 1
+                self._stats["bytes_saved"] += os.path.getsize(path)
+            return path
+
+        with self._lock:
+            self._stats["misses"] += 1
+        pdf_bytes = (render or generate_resume_pdf)(resume_text)
+        return self.put(resume_text, pdf_bytes, theme)
+
+    def get_bytes(self, resume_text: str, theme: str = "default", render=None) -> bytes:
+        try:
+            with open(self.get_or_render(resume_text, theme, render), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            # evicted (by another thread or process) between lookup and open
+            with self._lock:
+                self._stats["rerendered"] += 1
+            pdf_bytes = (render or generate_resume_pdf)(resume_text)
+            self.put(resume_text, pdf_bytes, theme)
+            return pdf_bytes
+
+    # -- storage --------------------------------------------------------------
+
+    def put(self, resume_text: str, pdf_bytes: bytes, theme: str = "default") -> str:
+        blob_name = hashlib.sha256(pdf_bytes).hexdigest() + ".pdf"
+        blob = os.path.join(self._blobs, blob_name)
+        if os.path.exists(blob):
+            os.utime(blob)
+            with self._lock:
+                self._stats["deduplicated"] += 1
+        else:
+            self._atomic_write(blob, pdf_bytes)
+            with self._lock:
+                self._total += len(pdf_bytes)
+        self._atomic_write(os.path.join(self._keys, render_key(resume_text, theme)), blob_name.encode("ascii"))
+        if self._total > self.max_bytes:
+            self._evict()
+        return blob
+
+    def _atomic_write(self, path, data: bytes):
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def _scan(self):
+        entries = []
+        total = 0
+        for entry in os.scandir(self._blobs):
+            if entry.name.endswith(".pdf"):
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+        return entries, total
+
+    def _evict(self):
+        entries, total = self._scan()
+        target = int(self.max_bytes * 0.9)
+        cutoff = None
+        if total > self.max_bytes:
+            entries.sort()
+            for mtime, size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+                total -= size
+                cutoff = mtime
+                with self._lock:
+                    self._stats["evictions"] += 1
+        with self._lock:
+            self._total = total
+        if cutoff is not None:
+            # a key written just after its blob can trail the cutoff; the next pass drops it
+            self._drop_keys_before(cutoff)
+
+    def _drop_keys_before(self, cutoff):
+        for entry in os.scandir(self._keys):
+            if entry.name.startswith(".tmp-"):
+                continue
+            try:
+                if entry.stat().st_mtime <= cutoff:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                continue
+
+    # -- metrics ----------------------------------------------------------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._stats)
+        lookups = out["hits"] + out["misses"]
+        out["hit_rate"] = out["hits"] / lookups if lookups else 0.0
+        out["stored_bytes"] = self._total
+        return out
@@ -0,0 +1,365 @@
+# ats_score.py — keyword coverage and TF-IDF similarity against job postings
+"""
+Scores a generated resume against many job descriptions at once.
+
+JobIndex tokenises the postings once into a shared vocabulary and keeps two
+NumPy views of the same sparse term-document matrix:
+- a forward index (CSR: posting -> terms), used to list a posting's keywords
+- an inverted index (CSC: term -> postings), used for scoring
+
+Scoring a resume only touches the postings lists of the resume's own terms,
+so one resume is scored against thousands of postings with a handful of
+np.bincount calls:
+- similarity: cosine of sublinear TF-IDF vectors (idf from the postings)
+- coverage:   share of a posting's skill keywords that appear in the resume
+- missing_skills:   entries of the merged all_skills list the posting asks
+                    for but the resume text never mentions
+- missing_keywords: other skill keywords from the posting the resume lacks
+
+Skill keywords are KEYWORD_LEXICON plus the aliases from skill_cache plus any
+`phrases` given to the index. Multi-word skills not known at index time count
+as present in a posting when all of their words are.
+
+    index = JobIndex(postings, titles)
+    for row in index.score(resume_text, all_skills, top_k=10): ...
+
+Run `python ats_score.py` for a build/score benchmark on synthetic postings.
+"""
+import re
+import json
+
+import numpy as np
+
+from skill_cache import SKILL_ALIASES, canonical_skill
+
+
+KEYWORD_LEXICON = {
+    "python", "java", "javascript", "typescript", "go", "rust", "c", "c++", "c#", "kotlin", "swift",
+    "scala", "ruby", "php", "sql", "bash", "react", "angular", "vue", "node.js", "next.js", "redux",
+    "html", "css", "tailwind", "django", "flask", "fastapi", "spring boot", "hibernate",
+    "express", ".net", "graphql", "rest api", "grpc", "microservices", "postgresql", "mysql",
+    "mongodb", "redis", "elasticsearch", "cassandra", "dynamodb", "sqlite", "kafka", "rabbitmq",
+    "spark", "airflow", "hadoop", "snowflake", "dbt", "aws", "gcp", "azure", "docker", "kubernetes",
+    "terraform", "ansible", "helm", "jenkins", "github actions", "gitlab", "ci/cd", "linux", "git",
+    "prometheus", "grafana", "datadog", "numpy", "pandas", "pytorch", "tensorflow", "scikit-learn",
+    "machine learning", "deep learning", "nlp", "llm", "computer vision", "data pipelines", "etl",
+    "jest", "pytest", "junit", "selenium", "cypress", "agile", "scrum", "jira", "figma",
+    "distributed systems", "system design", "oauth", "security", "observability", "maven", "gradle",
+}
+
+_STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or our that the their this to we
+will with you your they who what which while about across into over under within per via not
+can all any more most other some such than then there these those been being was were would
+should could may might also etc us role team work working experience years year strong good
+""".split())
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[./-][a-z0-9+#]+|/[a-z0-9]+)*[+#]*|\.net")
+
+# single-word aliases are safe to apply per token; multi-word ones go through phrases
+_TOKEN_ALIASES = {k: v for k, v in SKILL_ALIASES.items() if " " not in k and " " not in v}
+_TOKEN_ALIASES.pop("rest", None)   # "the rest of the team"
+
+
+def _tokens(text: str) -> list:
+    out = []
+    for t in _TOKEN.findall((text or "").lower()):
+        t = _TOKEN_ALIASES.get(t, t)
+        out.append(t)
+    return out
+
+
+def _phrase_key(skill: str) -> str:
+    """
+    Canonical, space-joined token form of a skill ("Spring-Boot" -> "spring boot").
+    """
+    return " ".join(_tokens(canonical_skill(skill))).replace("-", " ")
+
+
+def _terms(tokens: list, phrases: dict, max_n: int) -> list:
+    """
+    Unigrams (minus stopwords) plus any 2..max_n-grams that are known phrases,
+    mapped to their canonical form. A hyphenated token ("spring-boot") also
+    counts as the phrase its parts spell.
+    """
+    terms = [t for t in tokens if t not in _STOPWORDS and len(t) > 1 or t in ("c", "r")]
+    for t in tokens:
+        if "-" in t:
+            canon = phrases.get(t.replace("-", " "))
+            if canon:
+                terms.append(canon)
+    for n in range(2, max_n + 1):
+        for i in range(len(tokens) - n + 1):
+            canon = phrases.get(" ".join(tokens[i:i + n]))
+            if canon:
+                terms.append(canon)
+    return terms
+
+
+def load_postings(path: str):
+    """
+    Read postings from a .jsonl file ({"title", "description"} per line) or a
+    text file with postings separated by lines of "---". Returns (titles, texts).
+    """
+    titles, texts = [], []
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    titles.append(row.get("title", f"Posting {len(titles) + 1}"))
+                    texts.append(row.get("description") or row.get("text", ""))
+        else:
+            titles, texts = split_pasted(f.read())
+    return titles, texts
+
+
+def split_pasted(text: str):
+    """
+    Split pasted postings on lines of "---"; the first line of each is its title.
+    """
+    titles, texts = [], []
+    for chunk in re.split(r"(?m)^\s*-{3,}\s*$", text or ""):
+        chunk = chunk.strip()
+        if chunk:
+            titles.append(chunk.splitlines()[0].strip()[:80])
+            texts.append(chunk)
+    return titles, texts
+
+
+class JobIndex:
+    """
+    Vocabulary, forward and inverted index over a set of job postings.
+    """
+
+    def __init__(self, postings, titles=None, phrases=()):
+        self.titles = list(titles) if titles is not None else [f"Posting {i + 1}" for i in range(len(postings))]
+        self.n_docs = len(postings)
+
+        # phrase lexicon: surface n-gram -> canonical term
+        self._phrases = {}
+        for p in list(KEYWORD_LEXICON) + list(phrases):
+            key = _phrase_key(p)
+            if " " in key:
+                self._phrases[key] = key
+        for alias, canon in SKILL_ALIASES.items():
+            if " " in alias or " " in canon:
+                self._phrases[" ".join(_tokens(alias)).replace("-", " ")] = _phrase_key(canon)
+        self._max_n = max([k.count(" ") + 1 for k in self._phrases] or [1])
+
+        # COO triplets (doc, term, count)
+        self.vocab = {}
+        docs, term_ids, counts = [], [], []
+        for d, text in enumerate(postings):
+            tf = {}
+            for t in _terms(_tokens(text), self._phrases, self._max_n):
+                tid = self.vocab.setdefault(t, len(self.vocab))
+                tf[tid] = tf.get(tid, 0) + 1
+            docs.extend([d] * len(tf))
+            term_ids.extend(tf.keys())
+            counts.extend(tf.values())
+        self.terms = np.array(sorted(self.vocab, key=self.vocab.get), dtype=object)
+        docs = np.asarray(docs, dtype=np.int32)
+        term_ids = np.asarray(term_ids, dtype=np.int32)
+        counts = np.asarray(counts, dtype=np.float32)
+        n_terms = len(self.vocab)
+
+        df = np.bincount(term_ids, minlength=n_terms).astype(np.float32)
+        self.idf = (np.log((1 + self.n_docs) / (1 + df)) + 1).astype(np.float32)
+        weights = (1 + np.log(counts)) * self.idf[term_ids]
+        self.doc_norm = np.sqrt(np.bincount(docs, weights=weights ** 2, minlength=self.n_docs))
+
+        keyword_keys = {_phrase_key(k) for k in KEYWORD_LEXICON} | {_phrase_key(p) for p in phrases}
+        keyword_keys |= {_phrase_key(v) for v in SKILL_ALIASES.values()}
+        self.is_keyword = np.zeros(n_terms, dtype=bool)
+        for k in keyword_keys:
+            if k in self.vocab:
+                self.is_keyword[self.vocab[k]] = True
+        self.keyword_total = np.bincount(docs[self.is_keyword[term_ids]], minlength=self.n_docs)
+
+        # forward index (CSR, rows already in doc order)
+        self.doc_ptr = np.searchsorted(docs, np.arange(self.n_docs + 1))
+        self.doc_terms = term_ids
+
+        # inverted index (CSC): postings list of term t is inv_docs[term_ptr[t]:term_ptr[t + 1]]
+        order = np.argsort(term_ids, kind="stable")
+        self.term_ptr = np.searchsorted(term_ids[order], np.arange(n_terms + 1))
+        self.inv_docs = docs[order]
+        self.inv_weights = weights[order]
+
+    # -- query helpers ----------------------------------------------------------
+
+    def postings(self, term: str) -> np.ndarray:
+        """
+        Ids of the postings that contain `term` (a word or known phrase).
+        """
+        tid = self.vocab.get(term)
+        if tid is None:
+            return np.empty(0, dtype=np.int32)
+        return self.inv_docs[self.term_ptr[tid]:self.term_ptr[tid + 1]]
+
+    def _gather(self, tids):
+        """
+        Concatenated postings (doc ids, weights) of several term ids.
+        """
+        if len(tids) == 0:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        starts, ends = self.term_ptr[tids], self.term_ptr[tids + 1]
+        lengths = ends - starts
+        # vectorised concatenation of the slices [start, end)
+        offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+        idx = np.arange(lengths.sum()) + offsets
+        return self.inv_docs[idx], self.inv_weights[idx]
+
+    def _skill_presence(self, skills):
+        """
+        Boolean matrix (n_skills x n_docs): does posting d mention skill s?
+        """
+        present = np.zeros((len(skills), self.n_docs), dtype=bool)
+        for row, key in enumerate(skills):
+            if key in self.vocab:
+                present[row, self.postings(key)] = True
+                continue
+            words = [w for w in key.split() if w not in _STOPWORDS]
+            tids = np.array([self.vocab.get(w, -1) for w in words], dtype=np.int64)
+            if not words or (tids < 0).any():
+                continue
+            docs, _ = self._gather(tids)
+            present[row] = np.bincount(docs, minlength=self.n_docs) == len(words)
+        return present
+
+    # -- scoring ------------------------------------------------------------------
+
+    def score_arrays(self, resume_text: str):
+        """
+        (similarity, coverage, resume term-id array) for every posting.
+        """
+        tf = {}
+        for t in _terms(_tokens(resume_text), self._phrases, self._max_n):
+            tid = self.vocab.get(t)
+            if tid is not None:
+                tf[tid] = tf.get(tid, 0) + 1
+        tids = np.fromiter(tf.keys(), dtype=np.int64, count=len(tf))
+        counts = np.fromiter(tf.values(), dtype=np.float32, count=len(tf))
+        r_weights = (1 + np.log(counts)) * self.idf[tids] if len(tids) else counts
+        r_norm = float(np.sqrt((r_weights ** 2).sum())) or 1.0
+
+        # similarity: sum over shared terms of w_resume * w_posting, per posting
+        docs, weights = self._gather(tids)
+        per_term = np.repeat(r_weights, self.term_ptr[tids + 1] - self.term_ptr[tids])
+        dots = np.bincount(docs, weights=weights * per_term, minlength=self.n_docs)
+        norms = self.doc_norm * r_norm
+        similarity = np.divide(dots, norms, out=np.zeros(self.n_docs), where=norms > 0)
+
+        # coverage: matched keyword terms / keyword terms in the posting
+        kw_tids = tids[self.is_keyword[tids]]
+        kw_docs, _ = self._gather(kw_tids)
+        matched = np.bincount(kw_docs, minlength=self.n_docs)
+        coverage = np.divide(matched, self.keyword_total, out=np.zeros(self.n_docs),
+                             where=self.keyword_total > 0)
+        return similarity, coverage, tids
+
+    def score(self, resume_text: str, all_skills: str = "", top_k: int = None) -> list:
+        """
+        Per-posting report, best TF-IDF match first: title, similarity,
+        coverage, missing_skills (from `all_skills`) and missing_keywords.
+        """
+        similarity, coverage, resume_tids = self.score_arrays(resume_text)
+        order = np.argsort(-similarity, kind="stable")
+        if top_k:
+            order = order[:top_k]
+
+        in_resume = np.zeros(len(self.vocab), dtype=bool)
+        in_resume[resume_tids] = True
+
+        # all_skills entries the resume text never mentions, then which postings ask for them
+        skills = list(dict.fromkeys(s.strip() for s in (all_skills or "").split(",") if s.strip()))
+        keys = [_phrase_key(s) for s in skills]
+        resume_terms = set(_terms(_tokens(resume_text), {**self._phrases, **{k: k for k in keys if " " in k}},
+                                  max(self._max_n, max([k.count(" ") + 1 for k in keys] or [1]))))
+        absent = [i for i, k in enumerate(keys) if k and k not in resume_terms]
+        present = self._skill_presence([keys[i] for i in absent])
+
+        rows = []
+        for d in order:
+            terms = self.doc_terms[self.doc_ptr[d]:self.doc_ptr[d + 1]]
+            kw = terms[self.is_keyword[terms] & ~in_resume[terms]]
+            missing_skills = [skills[absent[j]] for j in np.flatnonzero(present[:, d])]
+            skill_keys = {keys[absent[j]] for j in np.flatnonzero(present[:, d])}
+            rows.append({
+                "posting": int(d),
+                "title": self.titles[d],
+                "similarity": round(float(similarity[d]), 4),
+                "coverage": round(float(coverage[d]), 4),
+                "missing_skills": missing_skills,
+                "missing_keywords": sorted(t for t in self.terms[kw] if t not in skill_keys),
+            })
+        return rows
+
+
+# ---------------------------------------------------------------------------
+# Benchmark / CLI
+# ---------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    import time
+    import random
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Score a resume against job postings")
+    parser.add_argument("--resume", help="resume Markdown file (default: a generated one)")
+    parser.add_argument("--postings", help=".jsonl or '---'-separated .txt file (default: synthetic)")
+    parser.add_argument("--skills", default="", help="merged all_skills list, comma separated")
+    parser.add_argument("--synthetic", type=int, default=5000, help="number of synthetic postings")
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.resume:
+        with open(args.resume, encoding="utf-8") as f:
+            resume = f.read()
+        all_skills = args.skills
+    else:
+        from load_test import random_user_data
+        from llm_backend import LocalBackend, set_backend
+        from resume_generator import generate_resume
+        set_backend(LocalBackend(latency_ms=0, jitter_ms=0))
+        details = {}
+        resume = generate_resume(random_user_data(random.Random(0)), details)
+        all_skills = args.skills or details["all_skills"]
+
+    if args.postings:
+        titles, texts = load_postings(args.postings)
+    else:
+        rnd = random.Random(1)
+        pool = sorted(KEYWORD_LEXICON)
+        filler = ("We are hiring a {r} to build and operate services used by millions. You will design APIs, "
+                  "own reliability, mentor engineers and collaborate with product. Required: {req}. "
+                  "Nice to have: {nice}. Experience with {extra} is a plus.")
+        roles = ["Backend Engineer", "Frontend Engineer", "Data Engineer", "SRE", "Full Stack Developer"]
+        titles, texts = [], []
+        for i in range(args.synthetic):
+            r = rnd.choice(roles)
+            titles.append(f"{r} #{i + 1}")
+            texts.append(filler.format(r=r, req=", ".join(rnd.sample(pool, 6)),
+                                       nice=", ".join(rnd.sample(pool, 4)), extra=rnd.choice(pool)))
+
+    t0 = time.perf_counter()
+    index = JobIndex(texts, titles)
+    build_ms = (time.perf_counter() - t0) * 1000
+
+    runs = 20
+    t0 = time.perf_counter()
+    for _ in range(runs):
+        index.score_arrays(resume)
+    arrays_ms = (time.perf_counter() - t0) * 1000 / runs
+    t0 = time.perf_counter()
+    for _ in range(runs):
+        rows = index.score(resume, all_skills, top_k=args.top)
+    score_ms = (time.perf_counter() - t0) * 1000 / runs
+
+    print(f"{index.n_docs} postings, {len(index.vocab)} terms, "
+          f"{len(index.inv_docs)} postings entries")
+    print(f"build: {build_ms:8.1f} ms   score all: {arrays_ms:6.2f} ms   "
+          f"score + top-{args.top} report: {score_ms:6.2f} ms")
+    for row in rows:
+        print(json.dumps(row))
@@ -0,0 +1,363 @@
+# llm_backend.py — pluggable chat backends for the generation pipeline
+"""
+Chat backends used by resume_generator and skill_expander.
+
+LLM_BACKEND selects the implementation:
+  openai  (default) real OpenAI API, or any OpenAI-compatible server via OPENAI_BASE_URL
+  stub    OpenAI client pointed at the local stub server (stub_server.py, LLM_STUB_URL)
+  local   in-process, rule-based responses; no network at all
+
+Setting LLM_RPM / LLM_TPM wraps whichever backend is chosen in a
+RateLimitedBackend (see rate_limiter.py).
+
+The local backend has a tunable latency / error profile so the pipeline can be
+run offline and load-tested:
+  LOCAL_LLM_LATENCY_MS   mean artificial latency per call (default 0)
+  LOCAL_LLM_JITTER_MS    std-dev of that latency (default 0)
+  LOCAL_LLM_ERROR_RATE   probability a call raises LocalBackendError (default 0)
+  LOCAL_LLM_SEED         seed for the latency / error RNG
+"""
+import os
+import re
+import time
+import random
+import logging
+import threading
+from abc import ABC, abstractmethod
+
+from dotenv import load_dotenv
+
+from prompts import (
+    resume_system_prompt,
+    enrichment_system_prompt,
+    skill_expansion_system_prompt,
+)
+from rate_limiter import estimate_tokens, limiter_from_env
+
+load_dotenv()
+
+DEFAULT_STUB_URL = "http://127.0.0.1:8008/v1"
+
+
+# ---------------------------------------------------------------------------
+# Usage accounting
+# ---------------------------------------------------------------------------
+
+# Running totals of prompt/completion tokens, including how many prompt tokens
+# the provider served from its prompt cache. Read via get_usage_stats().
+_usage_lock = threading.Lock()
+_usage_stats = {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+
+
+def _record_usage(resp):
+    """
+    Add the token usage of a chat completion to the running totals.
+    """
+    usage = getattr(resp, "usage", None)
+    if usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = (getattr(details, "cached_tokens", 0) or 0) if details is not None else 0
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    with _usage_lock:
+        _usage_stats["calls"] += 1
+        _usage_stats["prompt_tokens"] += prompt_tokens
+        _usage_stats["cached_tokens"] += cached
+        _usage_stats["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+    logging.info(f"LLM usage: prompt={prompt_tokens} cached={cached}")
+    return getattr(usage, "total_tokens", None)
+
+
+def get_usage_stats() -> dict:
+    """
+    Snapshot of token usage so far, with the share of prompt tokens served from cache.
+    """
+    with _usage_lock:
+        stats = dict(_usage_stats)
+    stats["cache_hit_ratio"] = (
+        stats["cached_tokens"] / stats["prompt_tokens"] if stats["prompt_tokens"] else 0.0
+    )
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# Rule-based fallbacks (shared by the local backend and the error paths)
+# ---------------------------------------------------------------------------
+
+def rule_based_bullets(raw_lines: str) -> str:
+    """
+    Turn raw experience lines into "•" bullets without calling a model.
+    """
+    bullets = []
+    for rl in raw_lines.split("\n"):
+        t = rl.strip().lstrip("-• ").strip()
+        if t:
+            bullets.append(f"• {t}")
+    return "\n".join(bullets)
+
+
+def rule_based_skills(skills: str) -> str:
+    """
+    Suggest related skills from a fixed table, keyed on the user's own skills.
+    """
+    base = [s.strip().lower() for s in skills.split(",") if s.strip()]
+    extra = []
+    if "python" in ",".join(base):
+        extra += ["Django", "Flask", "FastAPI", "NumPy", "Pandas"]
+    if "java" in ",".join(base):
+        extra += ["Spring Boot", "Hibernate", "Maven", "Jenkins"]
+    if "aws" in ",".join(base):
+        extra += ["Docker", "Kubernetes", "Terraform", "CI/CD"]
+    return ", ".join(list(dict.fromkeys(extra)))
+
+
+def _field(text: str, label: str, next_label: str = None, end: str = r"\n\n|$") -> str:
+    """
+    Pull the value after "Label:" from a templated user message.
+    """
+    if next_label:
+        end = rf"\n{next_label}:"
+    m = re.search(rf"(?m)^{label}:[ \t]*(.*?)(?={end})", text, re.S)
+    return m.group(1).strip() if m else ""
+
+
+def _local_resume(user_msg: str) -> str:
+    """
+    Assemble a Markdown resume from the fields of resume_user_template.
+    """
+    name = _field(user_msg, "Name", "Role")
+    role = _field(user_msg, "Role", "Seniority")
+    seniority = _field(user_msg, "Seniority", "Contact")
+    skills = _field(user_msg, "Skills", "Education")
+    education = _field(user_msg, "Education", "Achievements")
+    achievements = _field(user_msg, "Achievements", "Projects")
+    projects = _field(user_msg, "Projects", end=r"\n\nUse the provided enriched experience|$")
+    exp_match = re.search(r"ENRICHED EXPERIENCE:\n(.*?)(?:\n\nNOTE:|$)", user_msg, re.S)
+    experience = exp_match.group(1).strip() if exp_match else ""
+
+    skill_list = [s.strip() for s in skills.split(",") if s.strip()]
+    top = ", ".join(f"**{s}**" for s in skill_list[:4]) or "modern software tooling"
+
+    out = [f"{name} | {role}", "", "## Professional Summary"]
+    out.append(f"• {seniority} {role} with hands-on delivery experience across the stack.")
+    out.append(f"• Hands-on with {top}.")
+    out.append("• Builds reliable, well-tested services and automates delivery with **CI/CD**.")
+    out.append("• Collaborates closely with product and design to ship measurable improvements.")
+    out += ["", "## Technical Skills"]
+    out.append(f"Programming Languages & Frameworks: {', '.join(skill_list) or 'N/A'}")
+    out += ["", "## Professional Experience", experience or "No experience provided."]
+    out += ["", "## Education", education or "N/A"]
+    out += ["", "## Projects / Certifications / Achievements"]
+    for ln in (projects + "\n" + achievements).splitlines():
+        if ln.strip():
+            out.append(f"• {ln.strip().lstrip('-•').strip()}")
+    return "\n".join(out)
+
+
+# ---------------------------------------------------------------------------
+# Backends
+# ---------------------------------------------------------------------------
+
+class LocalBackendError(RuntimeError):
+    """
+    Injected failure from the local backend's error profile.
+    """
+
+
+class LLMBackend(ABC):
+    """
+    Interface: take OpenAI-style messages, return the assistant's text.
+    """
+    name = "base"
+
+    @abstractmethod
+    def chat(self, messages, model, temperature=0.6, max_tokens=900) -> str:
+        ...
+
+
+class OpenAIBackend(LLMBackend):
+    """
+    OpenAI (or OpenAI-compatible) HTTP backend.
+    """
+    name = "openai"
+
+    def __init__(self, api_key=None, base_url=None, max_retries=None):
+        from openai import OpenAI
+
+        kwargs = {} if max_retries is None else {"max_retries": max_retries}
+        self.client = OpenAI(
+            api_key=api_key or os.getenv("OPENAI_API_KEY"),
+            base_url=base_url or os.getenv("OPENAI_BASE_URL") or None,
+            **kwargs,
+        )
+        self._last = threading.local()
+
+    def chat(self, messages, model, temperature=0.6, max_tokens=900) -> str:
+        resp = self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+        self._last.total_tokens = _record_usage(resp)
+        return resp.choices[0].message.content.strip()
+
+    def last_total_tokens(self):
+        """
+        Total tokens of this thread's most recent call, when the provider reported it.
+        """
+        return getattr(self._last, "total_tokens", None)
+
+
+class LocalBackend(LLMBackend):
+    """
+    Deterministic offline backend built from the rule-based fallbacks.
+
+    Output depends only on the messages; latency and injected errors come from
+    a seeded RNG so load-test runs are reproducible.
+    """
+    name = "local"
+
+    def __init__(self, latency_ms=None, jitter_ms=None, error_rate=None, seed=None):
+        self.latency_ms = float(latency_ms if latency_ms is not None else os.getenv("LOCAL_LLM_LATENCY_MS", "0"))
+        self.jitter_ms = float(jitter_ms if jitter_ms is not None else os.getenv("LOCAL_LLM_JITTER_MS", "0"))
+        self.error_rate = float(error_rate if error_rate is not None else os.getenv("LOCAL_LLM_ERROR_RATE", "0"))
+        seed = seed if seed is not None else os.getenv("LOCAL_LLM_SEED")
+        self._rnd = random.Random(int(seed) if seed is not None else None)
+        self._rnd_lock = threading.Lock()
+
+    def _simulate(self):
+        with self._rnd_lock:
+            delay = max(0.0, self._rnd.gauss(self.latency_ms, self.jitter_ms)) if self.jitter_ms else self.latency_ms
+            fail = self._rnd.random() < self.error_rate
+        if delay:
+            time.sleep(delay / 1000.0)
+        if fail:
+            raise LocalBackendError("injected local backend failure")
+
+    def respond(self, messages) -> str:
+        """
+        Produce the response text for a prompt, with no latency or errors.
+        """
+        system = next((m["content"] for m in messages if m["role"] == "system"), "")
+        user = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+
+        if system == enrichment_system_prompt:
+            raw = user.split("RAW:\n", 1)[1] if "RAW:\n" in user else user
+            return rule_based_bullets(raw)
+        if system == skill_expansion_system_prompt:
+            return rule_based_skills(_field(user, "User skills", "Target role"))
+        if system == resume_system_prompt:
+            return _local_resume(user)
+        return user.strip()
+
+    def chat(self, messages, model, temperature=0.6, max_tokens=900) -> str:
+        self._simulate()
+        return self.respond(messages)
+
+
+def is_rate_limit_error(exc) -> bool:
+    return getattr(exc, "status_code", None) == 429
+
+
+def _retry_after(exc, default=5.0) -> float:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after", default))
+    except (TypeError, ValueError):
+        return default
+
+
+class RateLimitedBackend(LLMBackend):
+    """
+    Acquires request/token budget from a RateLimiter before each call and
+    pauses the shared budget when the provider still answers 429.
+    """
+
+    def __init__(self, inner, limiter):
+        if isinstance(inner, OpenAIBackend):
+            # the SDK's own 429 retries would sleep outside the limiter; fail fast instead
+            inner.client = inner.client.with_options(max_retries=0)
+        self.inner = inner
+        self.limiter = limiter
+        self.name = f"limited-{inner.name}"
+
+    def chat(self, messages, model, temperature=0.6, max_tokens=900) -> str:
+        reserved = self.reserve(messages, max_tokens)
+        return self.chat_reserved(reserved, messages, model, temperature, max_tokens)
+
+    def reserve(self, messages, max_tokens=900, timeout=None) -> int:
+        """
+        Wait (in the calling thread, in priority order) for budget for one
+        call; returns the reserved token count for chat_reserved().
+        Raises RateLimitTimeout after `timeout` seconds.
+        """
+        reserved = estimate_tokens(messages, max_tokens)
+        self.limiter.acquire(reserved, timeout=timeout)
+        return reserved
+
+    def chat_reserved(self, reserved, messages, model, temperature=0.6, max_tokens=900) -> str:
+        """
+        Make a call whose budget was already taken with reserve().
+        """
+        try:
+            text = self.inner.chat(messages, model=model, temperature=temperature, max_tokens=max_tokens)
+        except Exception as e:
+            if is_rate_limit_error(e):
+                self.limiter.penalize(_retry_after(e))
+            raise
+        last = getattr(self.inner, "last_total_tokens", None)
+        if last is not None:
+            self.limiter.settle(reserved, last())
+        return text
+
+
+# ---------------------------------------------------------------------------
+# Selection
+# ---------------------------------------------------------------------------
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def make_backend(kind: str = None) -> LLMBackend:
+    """
+    Build a backend by name ("openai", "stub" or "local"), rate-limited when configured.
+    """
+    kind = (kind or os.getenv("LLM_BACKEND", "openai")).strip().lower()
+    if kind == "local":
+        backend = LocalBackend()
+    elif kind == "stub":
+        backend = OpenAIBackend(
+            api_key=os.getenv("OPENAI_API_KEY") or "stub",
+            base_url=os.getenv("LLM_STUB_URL", DEFAULT_STUB_URL),
+            max_retries=0,   # the stub's injected errors must each be seen once
+        )
+    elif kind == "openai":
+        backend = OpenAIBackend()
+    else:
+        raise ValueError(f"Unknown LLM_BACKEND: {kind!r}")
+
+    limiter = limiter_from_env()
+    return RateLimitedBackend(backend, limiter) if limiter else backend
+
+
+def get_backend() -> LLMBackend:
+    """
+    Process-wide backend, created lazily from configuration on first use.
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = make_backend()
+    return _backend
+
+
+def set_backend(backend: LLMBackend):
+    """
+    Replace the process-wide backend (e.g. with a LocalBackend for load tests).
+    """
+    global _backend
+    with _backend_lock:
+        _backend = backend
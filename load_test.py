@@ -0,0 +1,352 @@
+# load_test.py — concurrent end-to-end load generator for the resume pipeline
+"""
+Drives generate_resume + generate_resume_pdf at configurable concurrency and
+arrival rate against a local stub model, and reports throughput, per-stage
+p50/p95/p99 latency, error rates and the saturation point as JSON.
+
+Examples:
+    # closed loop, sweep 1..16 workers, 300±100 ms model latency
+    python load_test.py --concurrency 1,2,4,8,16 --requests 80 --latency-ms 300 --jitter-ms 100
+
+    # open loop at 5 req/s through the HTTP stub server, results to a file
+    python load_test.py --backend stub --rate 5 --concurrency 8 --out results.json
+
+Compare two versions by diffing the JSON files (same --seed gives the same
+inputs and latency draws).
+"""
+import sys
+import math
+import json
+import time
+import random
+import argparse
+import platform
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from prompts import resume_system_prompt, enrichment_system_prompt, skill_expansion_system_prompt
+from llm_backend import LLMBackend, LocalBackend, OpenAIBackend, set_backend, get_usage_stats
+
+
+# ---------------------------------------------------------------------------
+# Synthetic inputs
+# ---------------------------------------------------------------------------
+
+_FIRST = ["Aarav", "Maya", "Lucas", "Priya", "Chen", "Sofia", "Omar", "Hannah", "Diego", "Aisha"]
+_LAST = ["Patel", "Nguyen", "Garcia", "Kim", "Müller", "Okafor", "Rossi", "Sato", "Cohen", "Silva"]
+_ROLES = ["Backend Engineer", "Software Developer", "DevOps Engineer", "Data Engineer",
+          "Full Stack Developer", "Frontend Engineer", "Site Reliability Engineer"]
+_SKILLS = ["Python", "Java", "Go", "TypeScript", "React", "Node.js", "Spring Boot", "AWS", "Azure",
+           "Docker", "Kubernetes", "PostgreSQL", "MySQL", "Redis", "Kafka", "Terraform", "Git", "GraphQL"]
+_COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Stark Industries", "Hooli", "Vandelay"]
+_DUTIES = [
+    "built REST APIs for the billing service",
+    "migrated batch jobs to Kafka streaming",
+    "wrote integration tests and raised coverage",
+    "containerised services with Docker and deployed to Kubernetes",
+    "tuned PostgreSQL queries for the reporting dashboard",
+    "set up CI/CD pipelines with GitHub Actions",
+    "added Redis caching in front of the catalogue API",
+    "mentored two junior developers",
+    "reduced cloud spend by rightsizing EC2 instances",
+]
+_SCHOOLS = ["State University", "Institute of Technology", "City College", "Polytechnic University"]
+_MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def random_user_data(rnd: random.Random) -> dict:
+    """
+    Build a realistic form submission (same keys as app.py's user_data).
+    """
+    first, last = rnd.choice(_FIRST), rnd.choice(_LAST)
+    role = rnd.choice(_ROLES)
+
+    jobs = []
+    year = 2025
+    for _ in range(rnd.randint(0, 3)):
+        start = year - rnd.randint(1, 4)
+        end = "Present" if year == 2025 else str(year)
+        duties = rnd.sample(_DUTIES, rnd.randint(2, 5))
+        jobs.append(
+            f"{rnd.choice(_COMPANIES)} – {role} | {rnd.choice(_MONTHS)} {start} – {end}\n"
+            + "\n".join(f"- {d}" for d in duties)
+        )
+        year = start
+
+    grad = year - rnd.randint(0, 2)
+    return {
+        "name": f"{first} {last}",
+        "contact": f"+1 (555) {rnd.randint(100, 999)}-{rnd.randint(1000, 9999)}",
+        "email": f"{first.lower()}.{last.lower()}@example.com",
+        "linkedin": f"https://www.linkedin.com/in/{first.lower()}{last.lower()}",
+        "github": f"https://github.com/{first.lower()}{rnd.randint(1, 99)}" if rnd.random() < 0.7 else "",
+        "portfolio": "",
+        "target_role": role,
+        "education": f"{rnd.choice(_SCHOOLS)} | {grad - 4} – {grad} | B.S. Computer Science",
+        "experience": "\n\n".join(jobs),
+        "projects": "\n".join(
+            f"[Project {i + 1}](https://github.com/{first.lower()}/p{i + 1}) – {rnd.choice(_DUTIES)}"
+            for i in range(rnd.randint(1, 3))
+        ),
+        "skills": ", ".join(rnd.sample(_SKILLS, rnd.randint(3, 9))),
+        "achievements": "AWS Certified Developer" if rnd.random() < 0.4 else "",
+    }
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of a list of numbers (None when empty).
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[k]
+
+
+class _Recorder:
+    """
+    Thread-safe collection of per-stage latencies (ms) and error counts.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def add(self, stage, ms):
+        with self.lock:
+            self.latencies[stage].append(ms)
+
+    def fail(self, stage):
+        with self.lock:
+            self.errors[stage] += 1
+
+    def summary(self):
+        out = {}
+        with self.lock:
+            stages = set(self.latencies) | set(self.errors)
+            for stage in sorted(stages):
+                vals = self.latencies.get(stage, [])
+                errs = self.errors.get(stage, 0)
+                total = len(vals) + errs
+                out[stage] = {
+                    "count": len(vals),
+                    "errors": errs,
+                    "error_rate": round(errs / total, 4) if total else 0.0,
+                    "mean_ms": round(sum(vals) / len(vals), 2) if vals else None,
+                    "p50_ms": _round(percentile(vals, 50)),
+                    "p95_ms": _round(percentile(vals, 95)),
+                    "p99_ms": _round(percentile(vals, 99)),
+                    "max_ms": _round(max(vals) if vals else None),
+                }
+        return out
+
+
+def _round(v):
+    return round(v, 2) if v is not None else None
+
+
+_STAGE_BY_PROMPT = {
+    resume_system_prompt: "llm.resume",
+    enrichment_system_prompt: "llm.enrich",
+    skill_expansion_system_prompt: "llm.skills",
+}
+
+
+class _TimedBackend(LLMBackend):
+    """
+    Wraps a backend and records each model call under an llm.* stage.
+    """
+
+    def __init__(self, inner, recorder):
+        self.inner = inner
+        self.recorder = recorder
+        self.name = f"timed-{inner.name}"
+
+    def chat(self, messages, model, temperature=0.6, max_tokens=900):
+        system = next((m["content"] for m in messages if m["role"] == "system"), "")
+        stage = _STAGE_BY_PROMPT.get(system, "llm.other")
+        t0 = time.perf_counter()
+        try:
+            text = self.inner.chat(messages, model=model, temperature=temperature, max_tokens=max_tokens)
+        except Exception:
+            self.recorder.fail(stage)
+            raise
+        self.recorder.add(stage, (time.perf_counter() - t0) * 1000)
+        return text
+
+
+# ---------------------------------------------------------------------------
+# Load runs
+# ---------------------------------------------------------------------------
+
+def _one_request(user_data, recorder, arrived_at):
+    """
+    Run the full pipeline once. In open-loop runs queue wait is measured from
+    the scheduled arrival time; closed-loop runs pass arrived_at=None.
+    """
+    from resume_generator import generate_resume
+    from pdf_util import generate_resume_pdf
+
+    start = time.perf_counter()
+    if arrived_at is None:
+        arrived_at = start
+    else:
+        recorder.add("queue_wait", (start - arrived_at) * 1000)
+    try:
+        t0 = time.perf_counter()
+        text = generate_resume(user_data)
+        recorder.add("generate_resume", (time.perf_counter() - t0) * 1000)
+    except Exception:
+        recorder.fail("generate_resume")
+        recorder.fail("end_to_end")
+        return
+    try:
+        t0 = time.perf_counter()
+        generate_resume_pdf(text)
+        recorder.add("generate_resume_pdf", (time.perf_counter() - t0) * 1000)
+    except Exception:
+        recorder.fail("generate_resume_pdf")
+        recorder.fail("end_to_end")
+        return
+    recorder.add("end_to_end", (time.perf_counter() - arrived_at) * 1000)
+
+
+def _usage_delta(before, after) -> dict:
+    """
+    Token usage (incl. cached prompt tokens) accrued between two get_usage_stats() snapshots.
+    """
+    out = {k: after[k] - before[k] for k in ("calls", "prompt_tokens", "cached_tokens", "completion_tokens")}
+    out["cache_hit_ratio"] = round(out["cached_tokens"] / out["prompt_tokens"], 4) if out["prompt_tokens"] else 0.0
+    return out
+
+
+def run_load(backend, concurrency, requests, rate=0.0, seed=0) -> dict:
+    """
+    Send `requests` pipeline runs through `concurrency` workers.
+
+    rate == 0 runs closed-loop (each worker starts the next request as soon as
+    it finishes); rate > 0 runs open-loop with Poisson arrivals at `rate`
+    requests/second, so queueing delay shows up once the workers saturate.
+    """
+    rnd = random.Random(seed)
+    inputs = [random_user_data(rnd) for _ in range(requests)]
+    recorder = _Recorder()
+    set_backend(_TimedBackend(backend, recorder))
+    from resume_generator import set_stage_observer
+    set_stage_observer(recorder.add)   # llm.limiter_wait / llm.queue_wait
+    from skill_expander import skill_cache
+    skill_cache.clear()
+    usage_before = get_usage_stats()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = []
+        next_arrival = started
+        for ud in inputs:
+            if rate > 0:
+                next_arrival += rnd.expovariate(rate)
+                delay = next_arrival - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                arrived = next_arrival
+            else:
+                arrived = None
+            futures.append(pool.submit(_one_request, ud, recorder, arrived))
+        for f in futures:
+            f.result()
+    elapsed = time.perf_counter() - started
+    set_stage_observer(None)
+
+    stages = recorder.summary()
+    ok = stages.get("end_to_end", {}).get("count", 0)
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "arrival_rate": rate,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(ok / elapsed, 3) if elapsed else 0.0,
+        "error_rate": stages.get("end_to_end", {}).get("error_rate", 0.0),
+        "stages": stages,
+        "skill_cache": skill_cache.stats(),
+        "llm_usage": _usage_delta(usage_before, get_usage_stats()),
+    }
+
+
+def find_saturation(runs, min_gain=0.05, slo_p99_ms=None):
+    """
+    First concurrency level where adding workers stops paying off: throughput
+    grows by less than `min_gain` or end-to-end p99 breaks the SLO.
+    """
+    for prev, cur in zip(runs, runs[1:]):
+        p99 = cur["stages"].get("end_to_end", {}).get("p99_ms")
+        if slo_p99_ms is not None and p99 is not None and p99 > slo_p99_ms:
+            return {"concurrency": prev["concurrency"], "reason": f"p99 {p99} ms > SLO {slo_p99_ms} ms"}
+        if prev["throughput_rps"] and cur["throughput_rps"] < prev["throughput_rps"] * (1 + min_gain):
+            return {"concurrency": prev["concurrency"], "reason": "throughput plateau"}
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test generate_resume + generate_resume_pdf")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="comma-separated worker counts to sweep")
+    parser.add_argument("--requests", type=int, default=40, help="requests per concurrency level")
+    parser.add_argument("--rate", type=float, default=0.0, help="open-loop arrivals per second (0 = closed loop)")
+    parser.add_argument("--backend", choices=["local", "stub"], default="local")
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="mean stub model latency")
+    parser.add_argument("--jitter-ms", type=float, default=100.0, help="std-dev of stub model latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="stub model failure probability")
+    parser.add_argument("--slo-p99-ms", type=float, default=None, help="end-to-end p99 budget for saturation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", default="", help="free-form tag stored in the output (e.g. git sha)")
+    parser.add_argument("--out", default="-", help="JSON output path ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    local = LocalBackend(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                         error_rate=args.error_rate, seed=args.seed)
+    server = None
+    if args.backend == "stub":
+        from stub_server import start_in_thread
+        server, url = start_in_thread(backend=local)
+        # no SDK retries: each injected 500 is reported once, not hidden in the latency
+        backend = OpenAIBackend(api_key="stub", base_url=url, max_retries=0)
+    else:
+        backend = local
+
+    runs = []
+    try:
+        for c in [int(x) for x in args.concurrency.split(",") if x.strip()]:
+            run = run_load(backend, c, args.requests, rate=args.rate, seed=args.seed)
+            runs.append(run)
+            print(f"concurrency={c:<3} throughput={run['throughput_rps']:.2f} rps "
+                  f"p99={run['stages'].get('end_to_end', {}).get('p99_ms')} ms "
+                  f"errors={run['error_rate']:.2%}", file=sys.stderr)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    report = {
+        "label": args.label,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "config": vars(args),
+        "runs": runs,
+        "saturation": find_saturation(runs, slo_p99_ms=args.slo_p99_ms),
+    }
+    payload = json.dumps(report, indent=2)
+    if args.out == "-":
+        print(payload)
+    else:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(payload + "\n")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -6,23 +6,26 @@ from reportlab.platypus import (
     HRFlowable, ListFlowable, ListItem
 )
 from reportlab.lib.enums import TA_CENTER
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.pdfbase.pdfdoc import PDFInfo, PDFDictionary, PDFString, PDFZCompress
+from xml.sax.saxutils import escape
 from io import BytesIO
-import re, random
+import os, re, random
+from profiling import profiled
 
-def generate_resume_pdf(resume_text: str, output_path: str = None):
-    buffer = BytesIO()
+# Bump whenever layout or styling changes, so cached PDFs (artifact_store.py)
+# rendered by an older version are not served.
+RENDERER_VERSION = "2"
 
-    # Document config (unchanged)
-    doc = SimpleDocTemplate(
-        output_path or buffer,
-        pagesize=letter,
-        topMargin=25,
-        bottomMargin=25,
-        leftMargin=38,
-        rightMargin=38,
-        title="Resume"
-    )
+# PDF_COMPACT=1 makes compact output the default (see _CompactDocTemplate)
+COMPACT_DEFAULT = os.getenv("PDF_COMPACT", "0").lower() in ("1", "true", "yes")
+
+# Styles are immutable once built, so they are created once per process and
+# shared by every render (see warm_up() / render_pool.py).
+_STYLES = None
 
+
+def _build_styles():
     styles = getSampleStyleSheet()
 
     # Base styles (Helvetica core fonts assumed available)
@@ -115,26 +118,244 @@ def generate_resume_pdf(resume_text: str, output_path: str = None):
         spaceAfter=0.5,
     )
 
-    elements = []
+    return {
+        "normal": normal,
+        "bold_enabled": bold_enabled,
+        "skill_label": skill_label_style,
+        "skill_text": skill_text_style,
+        "bullet": bullet_style,
+        "heading": heading_style,
+        "name": name_style,
+        "title": title_style,
+        "contact": contact_style,
+    }
+
+
+def get_styles():
+    """
+    Return the shared paragraph styles, building them on first use.
+    """
+    global _STYLES
+    if _STYLES is None:
+        _STYLES = _build_styles()
+    return _STYLES
+
+
+def warm_up():
+    """
+    Pre-build styles and render a small document once, so font metrics and
+    ReportLab's lazy imports are loaded before the first real request.
+    """
+    get_styles()
+    generate_resume_pdf("## Professional Summary\n• Warm-up render\n\n## Technical Skills\nTools: Git")
+
+
+def _parse_header(text: str):
+    """
+    Split the resume's header line ("Name | Role | phone | email | [LinkedIn](url) ...")
+    into (name, title, contact items as Paragraph markup).
+    """
+    line = ""
+    for ln in text.splitlines():
+        if ln.strip().startswith("## "):
+            break
+        if ln.strip():
+            line = ln.strip().lstrip("#").strip()
+            break
+    if not line:
+        return "", "", []
+
+    parts = [p.strip() for p in line.split("|") if p.strip()]
+    name = re.sub(r"\*\*(.+?)\*\*", r"\1", parts[0]) if parts else ""
+    title = ""
+    contacts = []
+    for part in parts[1:]:
+        link = re.match(r"^\[(.+?)\]\((\S+?)\)$", part)
+        if link:
+            contacts.append(f'<a href="{escape(link.group(2))}" color="black">{escape(link.group(1))}</a>')
+        elif "@" in part:
+            contacts.append(f'<a href="mailto:{escape(part)}" color="black">{escape(part)}</a>')
+        elif re.fullmatch(r"[+\d\s().\-]{7,}", part):
+            tel = re.sub(r"[^\d+]", "", part)
+            contacts.append(f'<a href="tel:{tel}" color="black">{escape(part)}</a>')
+        elif re.match(r"^https?://", part):
+            contacts.append(f'<a href="{escape(part)}" color="black">{escape(part)}</a>')
+        elif not title and not contacts:
+            title = part
+        else:
+            contacts.append(escape(part))
+    return name, title, contacts
+
+
+# ---------------------------------------------------------------------------
+# Compact output mode
+# ---------------------------------------------------------------------------
+# - page streams are Flate-compressed without the ASCII85 wrapper ReportLab
+#   adds by default (~25% of every stream)
+# - redundant font / leading / fill-colour switches and empty q..Q groups
+#   (one per Spacer) are dropped from the page content stream
+# - the Info dictionary keeps only the title
+# Helvetica is one of the standard 14 fonts, so nothing is embedded; TTF fonts
+# registered with ReportLab would already be subset automatically.
+
+_PDF_TOKEN = re.compile(
+    rb"\((?:\\.|[^\\()])*\)"        # literal string without nested parens
+    rb"|<[0-9A-Fa-f\s]*>"             # hex string
+    rb"|<<|>>|\[|\]"
+    rb"|/[^\s/\[\]()<>{}%]+"          # name
+    rb"|[-+]?(?:\d+\.?\d*|\.\d+)"      # number
+    rb"|[A-Za-z'\"*]+"                # operator
+)
+_STATE_ONLY_OPS = {b"cm", b"rg", b"RG", b"g", b"G", b"k", b"K", b"w", b"J", b"j", b"M", b"d",
+                   b"gs", b"ri", b"i", b"Tf", b"TL", b"Tc", b"Tw", b"Tz", b"Ts", b"Tr"}
+_FILL_OPS = {b"g", b"k", b"sc", b"scn", b"cs"}
+
+
+def _tokenize_ops(stream: bytes):
+    """
+    Split a content stream into (operands, operator) groups, or return None if
+    it holds anything this simple lexer doesn't handle (nested strings, inline images).
+    """
+    groups, operands, pos = [], [], 0
+    for m in _PDF_TOKEN.finditer(stream):
+        if stream[pos:m.start()].strip():
+            return None
+        pos = m.end()
+        tok = m.group(0)
+        if tok[:1].isalpha() or tok[:1] in (b"'", b'"', b"*"):
+            if tok in (b"BI", b"ID", b"EI"):
+                return None
+            groups.append((operands, tok))
+            operands = []
+        else:
+            operands.append(tok)
+    if operands or stream[pos:].strip():
+        return None
+    return groups
+
+
+def _compact_stream(stream: bytes) -> bytes:
+    """
+    Drop state changes that don't change anything and q..Q groups that draw nothing.
+    """
+    groups = _tokenize_ops(stream)
+    if groups is None:
+        return stream
+
+    # pass 1: redundant Tf / TL / rg, tracked through the q/Q state stack
+    state = {"font": None, "leading": None, "fill": (b"0", b"0", b"0")}
+    stack, kept = [], []
+    for operands, op in groups:
+        if op == b"q":
+            stack.append(dict(state))
+        elif op == b"Q":
+            state = stack.pop() if stack else state
+        elif op == b"Tf":
+            if tuple(operands) == state["font"]:
+                continue
+            state["font"] = tuple(operands)
+        elif op == b"TL":
+            if tuple(operands) == state["leading"]:
+                continue
+            state["leading"] = tuple(operands)
+        elif op == b"rg":
+            if tuple(operands) == state["fill"]:
+                continue
+            state["fill"] = tuple(operands)
+        elif op in _FILL_OPS:
+            state["fill"] = None
+        kept.append((operands, op))
+
+    # pass 2: empty BT..ET and q..Q groups that only set state
+    out = []
+    opens = []
+    for operands, op in kept:
+        if op == b"ET" and out and out[-1][1] == b"BT":
+            out.pop()
+            continue
+        out.append((operands, op))
+        if op == b"q":
+            opens.append(len(out) - 1)
+        elif op == b"Q" and opens:
+            start = opens.pop()
+            if all(o in _STATE_ONLY_OPS for _, o in out[start + 1:-1]):
+                del out[start:]
+    return b"\n".join(b" ".join(operands + [op]) for operands, op in out)
+
+
+class _CompactInfo(PDFInfo):
+    def format(self, document):
+        return PDFDictionary({"Title": PDFString(self.title)}).format(document)
+
+
+class _CompactCanvas(Canvas):
+    """
+    Canvas with a title-only Info dictionary that saves without ASCII85.
+    """
+
+    def __init__(self, *args, **kwargs):
+        # With page compression off, ReportLab gives page streams no filters of
+        # their own, so this document's defaultStreamFilters (plain Flate) apply.
+        # Compressed pages would take ASCII85 from the process-wide rl_config.useA85.
+        kwargs["pageCompression"] = 0
+        Canvas.__init__(self, *args, **kwargs)
+        self._doc.defaultStreamFilters = [PDFZCompress]
+        self._doc.info = _CompactInfo()
 
-    # Header (unchanged)
-    name = "Shubham Shrotriya"
-    title = "Software Developer"
-    contact_html = (
-        '<a href="tel:+19514659910" color="black">+1 (951) 465-9910</a> | '
-        '<a href="mailto:shubhamshrotriya31@gmail.com" color="black">shubhamshrotriya31@gmail.com</a> | '
-        '<a href="https://www.linkedin.com/in/shubhamshrotriya" color="black">LinkedIn</a> | '
-        '<a href="https://github.com/shubhamshrotriya16427" color="black">GitHub</a> | '
-        '<a href="https://shubhamshro.my.canva.site" color="black">Portfolio</a>'
+
+class _CompactDocTemplate(SimpleDocTemplate):
+    """
+    SimpleDocTemplate that rewrites each page's content stream via _compact_stream.
+    """
+
+    def afterPage(self):
+        code = "\n".join(self.canv._code).encode("latin-1")
+        self.canv._code[:] = [_compact_stream(code).decode("latin-1")]
+
+
+@profiled(skip_args=("output_path",))
+def generate_resume_pdf(resume_text: str, output_path: str = None, compact: bool = None):
+    buffer = BytesIO()
+    if compact is None:
+        compact = COMPACT_DEFAULT
+
+    # Document config (unchanged)
+    doc_class = _CompactDocTemplate if compact else SimpleDocTemplate
+    doc = doc_class(
+        output_path or buffer,
+        pagesize=letter,
+        topMargin=25,
+        bottomMargin=25,
+        leftMargin=38,
+        rightMargin=38,
+        title="Resume"
     )
-    elements.append(Paragraph(f"<b>{name}</b>", name_style))
-    elements.append(Paragraph(title, title_style))
-    elements.append(Paragraph(contact_html, contact_style))
-    elements.append(Spacer(1, 1.5))
+
+    st = get_styles()
+    normal = st["normal"]
+    bold_enabled = st["bold_enabled"]
+    skill_text_style = st["skill_text"]
+    bullet_style = st["bullet"]
+    heading_style = st["heading"]
+    name_style = st["name"]
+    title_style = st["title"]
+    contact_style = st["contact"]
+
+    elements = []
 
     raw = resume_text or ""
     clean_text = re.sub(r"```(?:markdown)?|```", "", raw).strip()
 
+    # Header, built from the resume's own first line
+    name, title, contacts = _parse_header(clean_text)
+    if name:
+        elements.append(Paragraph(f"<b>{escape(name)}</b>", name_style))
+    if title:
+        elements.append(Paragraph(escape(title), title_style))
+    if contacts:
+        elements.append(Paragraph(" | ".join(contacts), contact_style))
+    elements.append(Spacer(1, 1.5))
+
     # Normalize bullets and markdown bold
     clean_text = re.sub(r"(?m)^[\-\*]\s+", "• ", clean_text)
     clean_text = re.sub(r"\*\*(.+?)\*\*", r"<b>\1</b>", clean_text)
@@ -182,7 +403,7 @@ def generate_resume_pdf(resume_text: str, output_path: str = None):
     filtered = []
     for ln in lines:
         lower = ln.strip().lower()
-        if any(x in lower for x in ["linkedin", "github", "portfolio", "@gmail", "+1 (951)", "shubham shrotriya"]):
+        if any(x in lower for x in ["linkedin", "github", "portfolio", "@gmail"]):
             continue
         filtered.append(ln)
     clean_text = "\n".join(filtered).strip()
@@ -347,8 +568,35 @@ def generate_resume_pdf(resume_text: str, output_path: str = None):
 
         elements.append(Spacer(1, 1.2))
 
-    doc.build(elements)
+    if compact:
+        doc.build(elements, canvasmaker=_CompactCanvas)
+    else:
+        doc.build(elements)
 
     if not output_path:
         buffer.seek(0)
         return buffer.getvalue()
+
+
+if __name__ == "__main__":
+    # Benchmark: default vs. compact output
+    import sys
+    import time
+    from load_test import random_user_data
+    from llm_backend import LocalBackend, set_backend
+    from resume_generator import generate_resume
+
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    set_backend(LocalBackend())
+    rnd = random.Random(0)
+    texts = [generate_resume(random_user_data(rnd)) for _ in range(20)]
+    warm_up()
+
+    configs = [("default", False), ("compact", True)]
+    for label, compact in configs * 2:
+        sizes = []
+        t0 = time.perf_counter()
+        for i in range(runs):
+            sizes.append(len(generate_resume_pdf(texts[i % len(texts)], compact=compact)))
+        ms = (time.perf_counter() - t0) * 1000 / runs
+        print(f"{label:14s}: {ms:6.2f} ms/render, {sum(sizes) / len(sizes):7.0f} bytes avg")
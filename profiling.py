@@ -0,0 +1,299 @@
+# profiling.py — opt-in per-request profile capture with replayable inputs
+"""
+Slow renders are hard to reproduce after the fact. Functions decorated with
+@profiled run under cProfile when a capture is triggered, and the capture
+is written to PROFILE_DIR as a pair of files:
+
+  <stamp>-<name>.prof   pstats dump (open with snakeviz / pstats)
+  <stamp>-<name>.json   exact call arguments, duration, error and a top-N
+                        summary, so the call can be replayed offline
+
+A capture is triggered by either:
+- sampling: PROFILE_RATE (0..1) of calls, for leaving it on in production
+- a per-request flag: `with profile_request(): ...` (the app sets it for
+  `?profile=1` when PROFILE_ALLOW_QUERY=1; captures record the user's input)
+
+Captures of both kinds are capped at PROFILE_MAX_PER_MIN by a token bucket.
+Only the slowest calls are kept when PROFILE_MIN_MS is set, and the oldest
+captures are pruned beyond PROFILE_MAX_FILES. cProfile follows the calling
+thread only: time spent in LLM worker threads shows up as waits on
+Future.result. If another profiler is already active (Python 3.12+ allows
+only one), the call runs unprofiled. Capture errors are logged, never raised
+to the caller.
+
+  PROFILE_RATE          sampled fraction of calls (default 0 = sampling off)
+  PROFILE_DIR           capture directory (default .profiles)
+  PROFILE_MAX_PER_MIN   capture budget per process (default 6)
+  PROFILE_MIN_MS        discard captures faster than this (default 0)
+  PROFILE_MAX_FILES     captures kept on disk (default 200)
+
+Replay a capture (LLM calls go to the local backend unless --backend openai):
+  python profiling.py replay .profiles/<stamp>-generate_resume_pdf.json
+  python profiling.py list
+"""
+import io
+import os
+import json
+import time
+import random
+import pstats
+import cProfile
+import inspect
+import logging
+import importlib
+import threading
+import functools
+import itertools
+from contextlib import contextmanager
+
+
+PROFILE_RATE = float(os.getenv("PROFILE_RATE", "0") or 0)
+PROFILE_DIR = os.getenv("PROFILE_DIR", ".profiles")
+PROFILE_MAX_PER_MIN = float(os.getenv("PROFILE_MAX_PER_MIN", "6") or 0)
+PROFILE_MIN_MS = float(os.getenv("PROFILE_MIN_MS", "0") or 0)
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "200"))
+SUMMARY_LINES = 25
+
+_local = threading.local()
+
+
+@contextmanager
+def profile_request(enabled: bool = True):
+    """
+    Capture profiles for the @profiled calls made (in this thread) inside the block.
+    """
+    prev = getattr(_local, "forced", False)
+    _local.forced = enabled
+    try:
+        yield
+    finally:
+        _local.forced = prev
+
+
+# ---------------------------------------------------------------------------
+# Capture budget
+# ---------------------------------------------------------------------------
+
+class _CaptureBudget:
+    """
+    Non-blocking token bucket: at most `per_minute` captures, refilled continuously.
+    """
+
+    def __init__(self, per_minute):
+        self.per_minute = per_minute
+        self._tokens = per_minute
+        self._ts = time.monotonic()
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def take(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.per_minute, self._tokens + (now - self._ts) * self.per_minute / 60.0)
+            self._ts = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.dropped += 1
+            return False
+
+
+_budget = _CaptureBudget(PROFILE_MAX_PER_MIN)
+_stats = {"captured": 0, "discarded_fast": 0, "write_errors": 0}
+_stats_lock = threading.Lock()
+_seq = itertools.count()
+
+
+def _should_capture() -> bool:
+    if getattr(_local, "active", False):
+        return False   # already inside a profiled call on this thread
+    if not (getattr(_local, "forced", False) or (PROFILE_RATE and random.random() < PROFILE_RATE)):
+        return False
+    return _budget.take()
+
+
+def get_profile_stats() -> dict:
+    with _stats_lock:
+        out = dict(_stats)
+    out["rate_limited"] = _budget.dropped
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Writing captures
+# ---------------------------------------------------------------------------
+
+def _jsonable(value):
+    try:
+        json.dumps(value)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def _summary(profiler) -> str:
+    buf = io.StringIO()
+    pstats.Stats(profiler, stream=buf).sort_stats("cumulative").print_stats(SUMMARY_LINES)
+    return buf.getvalue()
+
+
+def _prune():
+    try:
+        entries = sorted(e for e in os.listdir(PROFILE_DIR) if e.endswith(".json"))
+    except FileNotFoundError:
+        return
+    for name in entries[:max(0, len(entries) - PROFILE_MAX_FILES)]:
+        for path in (name, name[:-5] + ".prof"):
+            try:
+                os.remove(os.path.join(PROFILE_DIR, path))
+            except FileNotFoundError:
+                pass
+
+
+def _write_capture(target, name, call_args, profiler, elapsed_ms, error):
+    stamp = time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}-{next(_seq):04d}"
+    base = os.path.join(PROFILE_DIR, f"{stamp}-{name}")
+    try:
+        meta = {
+            "function": f"{target.__module__}.{target.__qualname__}",
+            "name": name,
+            "timestamp": time.time(),
+            "elapsed_ms": round(elapsed_ms, 2),
+            "error": error,
+            "backend": os.getenv("LLM_BACKEND", "openai"),
+            "kwargs": {k: v for k, v in call_args.items() if _jsonable(v)},
+            "skipped_args": sorted(k for k, v in call_args.items() if not _jsonable(v)),
+            "profile": os.path.basename(base) + ".prof",
+            "summary": _summary(profiler),
+        }
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        profiler.dump_stats(base + ".prof")
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2, ensure_ascii=False)
+        _prune()
+    except Exception as e:
+        with _stats_lock:
+            _stats["write_errors"] += 1
+        logging.warning(f"Could not write profile capture {base}: {e}")
+        return
+    with _stats_lock:
+        _stats["captured"] += 1
+    logging.info(f"Profile captured: {base}.json ({elapsed_ms:.0f} ms)")
+
+
+# ---------------------------------------------------------------------------
+# Decorator
+# ---------------------------------------------------------------------------
+
+def profiled(name: str = None, skip_args=()):
+    """
+    Profile the decorated function when a capture is triggered. Arguments
+    named in `skip_args` (outputs such as file paths) are not recorded.
+    """
+    def decorate(fn):
+        label = name or fn.__name__
+        sig = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _should_capture():
+                return fn(*args, **kwargs)
+
+            bound = sig.bind(*args, **kwargs)
+            # copy now: the call may mutate its inputs (or fill output dicts)
+            call_args = json.loads(json.dumps(
+                {k: v for k, v in bound.arguments.items() if k not in skip_args and _jsonable(v)}))
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError as e:
+                # another profiler is active on this thread (3.12+ raises)
+                logging.warning(f"Profile capture of {label} skipped: {e}")
+                return fn(*args, **kwargs)
+            error = None
+            _local.active = True
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                error = repr(e)
+                raise
+            finally:
+                profiler.disable()
+                _local.active = False
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                if elapsed_ms >= PROFILE_MIN_MS:
+                    _write_capture(fn, label, call_args, profiler, elapsed_ms, error)
+                else:
+                    with _stats_lock:
+                        _stats["discarded_fast"] += 1
+
+        wrapper.__wrapped_profiled__ = fn
+        return wrapper
+    return decorate
+
+
+# ---------------------------------------------------------------------------
+# Replay
+# ---------------------------------------------------------------------------
+
+def load_capture(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def replay(path: str, runs: int = 1):
+    """
+    Re-run a captured call with its recorded arguments under cProfile.
+    Returns (pstats.Stats, list of per-run milliseconds).
+    """
+    meta = load_capture(path)
+    module_name, _, qualname = meta["function"].rpartition(".")
+    fn = getattr(importlib.import_module(module_name), qualname)
+    fn = getattr(fn, "__wrapped_profiled__", fn)
+
+    profiler = cProfile.Profile()
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            fn(**meta["kwargs"])
+        finally:
+            profiler.disable()
+        timings.append((time.perf_counter() - start) * 1000)
+    return pstats.Stats(profiler), timings
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="List or replay profile captures")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list")
+    rp = sub.add_parser("replay")
+    rp.add_argument("capture", help="path to a capture .json")
+    rp.add_argument("--runs", type=int, default=1)
+    rp.add_argument("--backend", default="local", help="LLM backend for the replay (local, stub, openai)")
+    rp.add_argument("--sort", default="cumulative")
+    rp.add_argument("--out", help="write the replay's pstats dump here")
+    args = parser.parse_args()
+
+    if args.cmd == "list":
+        try:
+            names = sorted(n for n in os.listdir(PROFILE_DIR) if n.endswith(".json"))
+        except FileNotFoundError:
+            names = []
+        for n in names:
+            meta = load_capture(os.path.join(PROFILE_DIR, n))
+            status = f"  error={meta['error']}" if meta.get("error") else ""
+            print(f"{meta['elapsed_ms']:9.1f} ms  {n}{status}")
+    else:
+        from llm_backend import make_backend, set_backend
+        set_backend(make_backend(args.backend))
+        stats, timings = replay(args.capture, args.runs)
+        meta = load_capture(args.capture)
+        print(f"captured: {meta['elapsed_ms']:.1f} ms   replay: " + ", ".join(f"{t:.1f} ms" for t in timings))
+        if args.out:
+            stats.dump_stats(args.out)
+        stats.sort_stats(args.sort).print_stats(SUMMARY_LINES)
@@ -49,9 +49,19 @@ STYLE RULES:
 - Do NOT invent company names or fake experience
 """
 
-enrichment_prompt_prefix = """
+# ---------------------------------------------------------------------------
+# Static prompt prefixes
+# ---------------------------------------------------------------------------
+# Everything above the USER DATA / RAW blocks must stay byte-identical between
+# calls so the provider can serve it from its prompt cache. Per-user values go
+# only into the *_user_template strings below, which are always sent last.
+# OpenAI only caches prefixes of 1024+ tokens; these are currently ~500 (resume),
+# ~210 (enrichment) and ~50 (skills) tokens, so cached_tokens stays 0 until a
+# prefix grows past that threshold. The ordering is kept so it pays off then.
+
+enrichment_system_prompt = """
 You are a senior resume writing assistant for software engineering professionals.
-Rewrite the following raw experience bullets into powerful, measurable, and technically detailed statements.
+Rewrite the raw experience bullets you are given into powerful, measurable, and technically detailed statements.
 
 Each bullet must:
 - Start with “•”
@@ -61,13 +71,56 @@ Each bullet must:
 - Avoid generic wording like “Worked on,” “Involved in,” or “Responsible for.”
 
 Input format:
+SENIORITY: <level>
+ROLE: <target role>
+TECH SKILLS: <comma-separated skills>
 RAW:
 - <raw line 1>
 - <raw line 2>
 
-SENIORITY: {seniority}
+Return only 4–6 rewritten bullet points, starting each with “•”.
+"""
+
+skill_expansion_system_prompt = """
+You suggest 6–10 advanced or related professional skills, frameworks, or tools
+for a software candidate, given their current skills and target role.
+Return as a comma-separated list only (no sentences).
+"""
+
+
+# ---------------------------------------------------------------------------
+# Per-request templates (variable data, always appended after the prefix)
+# ---------------------------------------------------------------------------
+
+resume_user_template = """USER DATA:
+Name: {name}
+Role: {role}
+Seniority: {seniority}
+Contact: {contact}
+Email: {email}
+Skills: {skills}
+Education: {education}
+Achievements: {achievements}
+Projects: {projects}
+
+Use the provided enriched experience below for the 'Professional Experience' section.
+
+ENRICHED EXPERIENCE:
+{experience}"""
+
+low_experience_note = (
+    "\n\nNOTE: The candidate has limited professional experience. "
+    "Make sure the resume still looks like a full, rich one-page professional document. "
+    "Expand the Professional Summary with technical exposure, teamwork, learning attitude, and relevant projects. "
+    "Add more detail to Technical Skills and Projects/Achievements to ensure the layout fills one page naturally "
+    "but does not exceed one page. Keep the same section structure and formatting."
+)
+
+enrichment_user_template = """SENIORITY: {seniority}
 ROLE: {role}
 TECH SKILLS: {skills}
-
-Return only 4–6 rewritten bullet points, starting each with “•”.
+RAW:
 """
+
+skill_expansion_user_template = """User skills: {skills}
+Target role: {role}"""
@@ -0,0 +1,323 @@
+# rate_limiter.py — shared token-bucket limiter for LLM calls
+"""
+All sessions and batch jobs share one OPENAI_API_KEY. RateLimiter enforces
+request-per-minute and token-per-minute budgets *before* each call, so bursts
+queue locally instead of turning into provider 429s.
+
+- Two token buckets (requests, tokens), refilled continuously.
+- Priority classes: waiting "interactive" calls (form submissions) are served
+  before "batch" calls, and batch calls may not drain the buckets below
+  `batch_reserve` of capacity, leaving headroom for interactive users.
+- Optional cross-process sharing: with a state file the bucket levels live in
+  that file and are updated under an exclusive flock (POSIX only). Priority
+  ordering stays per process: each process serves its own interactive waiters
+  first, but processes sharing the file compete for budget on equal terms.
+- Queue-wait metrics per priority class via stats().
+
+Configuration (llm_backend wraps the backend when LLM_RPM or LLM_TPM is set):
+  LLM_RPM                 requests per minute (0 = unlimited)
+  LLM_TPM                 tokens per minute (0 = unlimited)
+  LLM_RATE_STATE_FILE     share budgets across processes through this file
+  LLM_BATCH_RESERVE       fraction of capacity batch calls must leave (default 0.2)
+
+Mark bulk work with `with request_priority("batch"): ...`.
+"""
+import os
+import json
+import time
+import heapq
+import itertools
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: file sharing unavailable, fall back to in-process
+    fcntl = None
+
+
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+_local = threading.local()
+
+
+@contextmanager
+def request_priority(priority: str):
+    """
+    Run the enclosed LLM calls (in this thread) under the given priority class.
+    """
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority {priority!r}; expected one of {sorted(PRIORITIES)}")
+    prev = getattr(_local, "priority", None)
+    _local.priority = priority
+    try:
+        yield
+    finally:
+        _local.priority = prev
+
+
+def current_priority() -> str:
+    return getattr(_local, "priority", None) or "interactive"
+
+
+# ---------------------------------------------------------------------------
+# Token estimation
+# ---------------------------------------------------------------------------
+
+_encoding = None
+_encoding_failed = False
+
+
+def estimate_tokens(messages, max_tokens=0) -> int:
+    """
+    Prompt tokens (tiktoken when its encoding is available locally, else
+    ~4 chars/token) plus the completion budget.
+    """
+    global _encoding, _encoding_failed
+    text = "".join(m.get("content", "") for m in messages)
+    if _encoding is None and not _encoding_failed:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _encoding_failed = True
+    if _encoding is not None:
+        prompt = len(_encoding.encode(text))
+    else:
+        prompt = len(text) // 4 + 1
+    return prompt + 4 * len(messages) + (max_tokens or 0)
+
+
+# ---------------------------------------------------------------------------
+# Bucket state (in-process or file-backed)
+# ---------------------------------------------------------------------------
+
+class _MemoryState:
+    def __init__(self, capacity):
+        self._lock = threading.Lock()
+        self._state = {"requests": capacity[0], "tokens": capacity[1], "ts": time.time(), "blocked_until": 0.0}
+
+    @contextmanager
+    def locked(self):
+        with self._lock:
+            yield self._state
+
+
+class _FileState:
+    """
+    Bucket levels kept in a small JSON file, read-modify-written under flock.
+    """
+
+    def __init__(self, path, capacity):
+        self.path = path
+        self.capacity = capacity
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def locked(self):
+        with self._lock, open(self.path, "a+", encoding="utf-8") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                raw = f.read()
+                try:
+                    state = json.loads(raw) if raw.strip() else None
+                except ValueError:
+                    state = None
+                if not state:
+                    state = {"requests": self.capacity[0], "tokens": self.capacity[1],
+                             "ts": time.time(), "blocked_until": 0.0}
+                yield state
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+# ---------------------------------------------------------------------------
+# Limiter
+# ---------------------------------------------------------------------------
+
+class RateLimitTimeout(TimeoutError):
+    """
+    Raised when acquire() could not get budget within its timeout.
+    """
+
+
+class RateLimiter:
+    """
+    Request- and token-per-minute token buckets with priority queueing.
+    """
+
+    def __init__(self, rpm=0, tpm=0, state_file=None, batch_reserve=0.2, poll_interval=0.05):
+        self.rpm = float(rpm or 0)
+        self.tpm = float(tpm or 0)
+        self.batch_reserve = batch_reserve
+        self.poll_interval = poll_interval
+        capacity = (self.rpm or float("inf"), self.tpm or float("inf"))
+        if state_file and fcntl is not None:
+            self._state = _FileState(state_file, capacity)
+        else:
+            self._state = _MemoryState(capacity)
+
+        self._cond = threading.Condition()
+        self._waiting = []              # heap of (priority rank, seq)
+        self._seq = itertools.count()
+        self._metrics = {p: {"acquired": 0, "timeouts": 0, "wait_total_s": 0.0, "wait_max_s": 0.0,
+                             "recent": deque(maxlen=1000)} for p in PRIORITIES}
+
+    # -- bucket maths ---------------------------------------------------------
+
+    def _refill(self, st, now):
+        elapsed = max(0.0, now - st["ts"])
+        st["ts"] = now
+        if self.rpm:
+            st["requests"] = min(self.rpm, st["requests"] + elapsed * self.rpm / 60.0)
+        if self.tpm:
+            st["tokens"] = min(self.tpm, st["tokens"] + elapsed * self.tpm / 60.0)
+
+    def _try_take(self, tokens, priority):
+        """
+        Take one request + `tokens` if the buckets allow it. Returns 0 on
+        success, otherwise an estimate of seconds until it might succeed.
+        """
+        reserve = self.batch_reserve if priority == "batch" else 0.0
+        now = time.time()
+        with self._state.locked() as st:
+            self._refill(st, now)
+            if st.get("blocked_until", 0.0) > now:
+                return st["blocked_until"] - now
+            waits = []
+            if self.rpm:
+                # the reserve never asks for more than a full bucket
+                need = min(1 + reserve * self.rpm, self.rpm)
+                if st["requests"] < need:
+                    waits.append((need - st["requests"]) * 60.0 / self.rpm)
+            if self.tpm:
+                # a single call larger than the whole bucket may still run once it is full
+                need = min(min(tokens, self.tpm) + reserve * self.tpm, self.tpm)
+                if st["tokens"] < need:
+                    waits.append((need - st["tokens"]) * 60.0 / self.tpm)
+            if waits:
+                return max(waits)
+            if self.rpm:
+                st["requests"] -= 1
+            if self.tpm:
+                st["tokens"] -= tokens
+            return 0.0
+
+    # -- public API -------------------------------------------------------------
+
+    def acquire(self, tokens=0, priority=None, timeout=None) -> float:
+        """
+        Block until budget for one request of `tokens` tokens is available.
+        Returns the seconds spent waiting; raises RateLimitTimeout on timeout.
+        """
+        priority = priority or current_priority()
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {priority!r}")
+        if not self.rpm and not self.tpm:
+            return 0.0
+
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        ticket = (PRIORITIES[priority], next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+        try:
+            while True:
+                with self._cond:
+                    # only the head of the local queue competes for budget
+                    while self._waiting[0] != ticket:
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            raise RateLimitTimeout(f"no LLM budget within {timeout}s ({priority})")
+                        self._cond.wait(remaining if remaining is not None else None)
+                wait = self._try_take(tokens, priority)
+                if wait <= 0:
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise RateLimitTimeout(f"no LLM budget within {timeout}s ({priority})")
+                # other processes may refill/drain the shared file; re-check periodically
+                sleep_for = min(wait, self.poll_interval * 10) if isinstance(self._state, _FileState) else wait
+                with self._cond:
+                    self._cond.wait(min(sleep_for, remaining) if remaining is not None else sleep_for)
+        except RateLimitTimeout:
+            self._record(priority, time.monotonic() - start, timed_out=True)
+            raise
+        finally:
+            with self._cond:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+
+        waited = time.monotonic() - start
+        self._record(priority, waited)
+        return waited
+
+    def settle(self, reserved_tokens, actual_tokens):
+        """
+        Correct the token bucket once the real usage of a call is known.
+        """
+        if not self.tpm or actual_tokens is None:
+            return
+        with self._state.locked() as st:
+            st["tokens"] = min(self.tpm, st["tokens"] + reserved_tokens - actual_tokens)
+
+    def penalize(self, seconds):
+        """
+        Provider said 429: stop handing out budget to everyone for `seconds`.
+        """
+        until = time.time() + max(0.0, seconds)
+        with self._state.locked() as st:
+            st["blocked_until"] = max(st.get("blocked_until", 0.0), until)
+            st["requests"] = min(st["requests"], 0.0) if self.rpm else st["requests"]
+
+    def _record(self, priority, waited, timed_out=False):
+        with self._cond:
+            m = self._metrics[priority]
+            if timed_out:
+                m["timeouts"] += 1
+                return
+            m["acquired"] += 1
+            m["wait_total_s"] += waited
+            m["wait_max_s"] = max(m["wait_max_s"], waited)
+            m["recent"].append(waited)
+
+    def stats(self) -> dict:
+        """
+        Queue-wait metrics per priority class (seconds).
+        """
+        out = {"rpm": self.rpm, "tpm": self.tpm}
+        with self._cond:
+            out["waiting"] = len(self._waiting)
+            for p, m in self._metrics.items():
+                recent = sorted(m["recent"])
+                out[p] = {
+                    "acquired": m["acquired"],
+                    "timeouts": m["timeouts"],
+                    "wait_mean_s": round(m["wait_total_s"] / m["acquired"], 4) if m["acquired"] else 0.0,
+                    "wait_p95_s": round(recent[int(0.95 * (len(recent) - 1))], 4) if recent else 0.0,
+                    "wait_max_s": round(m["wait_max_s"], 4),
+                }
+        return out
+
+
+def limiter_from_env():
+    """
+    Build a RateLimiter from LLM_RPM / LLM_TPM, or None when neither is set.
+    """
+    rpm = float(os.getenv("LLM_RPM", "0") or 0)
+    tpm = float(os.getenv("LLM_TPM", "0") or 0)
+    if not rpm and not tpm:
+        return None
+    return RateLimiter(
+        rpm=rpm,
+        tpm=tpm,
+        state_file=os.getenv("LLM_RATE_STATE_FILE") or None,
+        batch_reserve=float(os.getenv("LLM_BATCH_RESERVE", "0.2")),
+    )
@@ -0,0 +1,387 @@
+# render_pool.py — warm process pool for generate_resume_pdf
+"""
+ReportLab layout is pure Python, so concurrent renders in one process
+serialise on the GIL. RenderPool keeps long-lived worker processes that
+import ReportLab and build the paragraph styles once at startup
+(pdf_util.warm_up), then render resume text to PDF bytes or a file path.
+
+- bounded queue: at most `max_queue` jobs pending; submit() blocks or raises
+  RenderPoolFull
+- per-job timeout: a worker that overruns is killed and replaced, and the job
+  fails with TimeoutError
+- recycling: each worker exits after `max_jobs_per_worker` jobs to cap memory,
+  and a fresh one is started in its place
+- crash handling: workers that fail to start or die are replaced with
+  exponential backoff; after `max_restart_failures` failures in a row the pool
+  stops restarting and, once no worker is left, fails pending and new jobs
+- workers are started on a separate thread, so results and timeouts keep
+  being processed while a replacement spawns
+
+    pool = RenderPool(workers=4)
+    pdf_bytes = pool.render(resume_text)
+    pool.close()
+
+Run `python render_pool.py` for a serial-vs-pool throughput benchmark.
+"""
+import os
+import time
+import queue
+import logging
+import heapq
+import threading
+import itertools
+import multiprocessing as mp
+from concurrent.futures import Future
+
+
+class RenderPoolFull(RuntimeError):
+    """
+    Raised when the pool's bounded queue has no room for another job.
+    """
+
+
+class RenderPoolClosed(RuntimeError):
+    """
+    Raised when submitting to a pool that has been closed.
+    """
+
+
+# ---------------------------------------------------------------------------
+# Worker side
+# ---------------------------------------------------------------------------
+
+def _worker_main(task_q, result_q, max_jobs):
+    """
+    Worker process loop: warm up once, then render jobs until recycled.
+    """
+    pid = os.getpid()
+    try:
+        import pdf_util
+        pdf_util.warm_up()
+    except Exception as e:
+        result_q.put(("crash", pid, None, repr(e)))
+        return
+    result_q.put(("ready", pid, None, None))
+
+    done = 0
+    while not max_jobs or done < max_jobs:
+        item = task_q.get()
+        if item is None:
+            break
+        job_id, resume_text, output_path = item
+        result_q.put(("start", pid, job_id, None))
+        try:
+            out = pdf_util.generate_resume_pdf(resume_text, output_path)
+            result_q.put(("ok", pid, job_id, output_path if output_path else out))
+        except Exception as e:
+            result_q.put(("error", pid, job_id, repr(e)))
+        done += 1
+    result_q.put(("exit", pid, None, None))
+
+
+# ---------------------------------------------------------------------------
+# Pool
+# ---------------------------------------------------------------------------
+
+class RenderPool:
+    """
+    Long-lived PDF rendering processes with bounded queueing and timeouts.
+    """
+
+    def __init__(self, workers=None, max_queue=64, job_timeout=30.0,
+                 max_jobs_per_worker=200, start_method="spawn",
+                 restart_backoff=0.5, max_restart_backoff=30.0, max_restart_failures=5):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.job_timeout = job_timeout
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.restart_backoff = restart_backoff
+        self.max_restart_backoff = max_restart_backoff
+        self.max_restart_failures = max_restart_failures
+
+        self._ctx = mp.get_context(start_method)
+        self._task_q = self._ctx.Queue()
+        self._result_q = self._ctx.Queue()
+        self._slots = threading.BoundedSemaphore(max_queue)
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._futures = {}   # job_id -> Future
+        self._running = {}   # job_id -> (pid, deadline)
+        self._procs = {}     # pid -> Process
+        self._closed = False
+        self._broken = None      # reason, once restarts were given up
+        self._failures = 0       # consecutive start failures / crashes
+        self._spawn_due = []     # heap of monotonic times a replacement is due
+        self._spawn_cond = threading.Condition(self._lock)
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "timeouts": 0,
+                       "rejected": 0, "recycled": 0, "crashed": 0, "killed": 0, "spawn_failures": 0}
+
+        for _ in range(self.workers):
+            self._spawn()
+        self._spawner = threading.Thread(target=self._spawn_loop, name="render-pool-spawner", daemon=True)
+        self._spawner.start()
+        self._supervisor = threading.Thread(target=self._supervise, name="render-pool", daemon=True)
+        self._supervisor.start()
+
+    # -- public API ---------------------------------------------------------
+
+    def submit(self, resume_text: str, output_path: str = None, block=True, timeout=None) -> Future:
+        """
+        Queue a render. The Future resolves to PDF bytes, or to output_path
+        when one is given. Raises RenderPoolFull if no slot frees up in time.
+        """
+        if self._closed:
+            raise RenderPoolClosed("RenderPool is closed")
+        if self._broken:
+            raise RenderPoolClosed(f"RenderPool has no workers left: {self._broken}")
+        if not self._slots.acquire(block, timeout):
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise RenderPoolFull(f"render queue is full ({self.max_queue} jobs pending)")
+
+        fut = Future()
+        job_id = next(self._ids)
+        with self._lock:
+            self._futures[job_id] = fut
+            self._stats["submitted"] += 1
+        self._task_q.put((job_id, resume_text, output_path))
+        return fut
+
+    def render(self, resume_text: str, output_path: str = None):
+        """
+        Blocking convenience wrapper around submit().
+        """
+        return self.submit(resume_text, output_path).result()
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._stats)
+            out["pending"] = len(self._futures)
+            out["running"] = len(self._running)
+            out["workers"] = len(self._procs)
+            out["restarts_pending"] = len(self._spawn_due)
+        return out
+
+    def close(self, wait=True):
+        """
+        Stop accepting jobs, let workers drain the queue and exit.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        with self._lock:
+            procs = list(self._procs.values())
+            self._spawn_due.clear()
+            self._spawn_cond.notify_all()
+        for _ in procs:
+            self._task_q.put(None)
+        if wait:
+            for p in procs:
+                p.join(self.job_timeout)
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+        with self._lock:
+            self._procs.clear()
+        self._supervisor.join(1.0)
+        self._spawner.join(1.0)
+        with self._lock:
+            leftovers = list(self._futures.values())
+            self._futures.clear()
+        for fut in leftovers:
+            if not fut.done():
+                fut.set_exception(RenderPoolClosed("RenderPool closed before the job ran"))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -- internals ----------------------------------------------------------
+
+    def _spawn(self):
+        p = self._ctx.Process(
+            target=_worker_main,
+            args=(self._task_q, self._result_q, self.max_jobs_per_worker),
+            daemon=True,
+        )
+        p.start()
+        with self._lock:
+            self._procs[p.pid] = p
+
+    def _finish(self, job_id, result=None, exc=None):
+        with self._lock:
+            fut = self._futures.pop(job_id, None)
+            self._running.pop(job_id, None)
+            if fut is not None:
+                self._stats["failed" if exc else "completed"] += 1
+        if fut is None:
+            return
+        self._slots.release()
+        if exc is not None:
+            fut.set_exception(exc)
+        else:
+            fut.set_result(result)
+
+    def _replace(self, pid, reason):
+        """
+        Drop a worker (after it exited, crashed or was killed) and schedule a
+        new one; crashes back off exponentially and count towards giving up.
+        """
+        with self._lock:
+            proc = self._procs.pop(pid, None)
+            if proc is None:
+                return   # already handled (e.g. crash message and dead-process check)
+            orphans = [j for j, (wpid, _) in self._running.items() if wpid == pid]
+            self._stats[reason] += 1
+        proc.join(1.0)
+        for job_id in orphans:
+            self._finish(job_id, exc=RuntimeError(f"render worker {pid} {reason}"))
+        if reason == "crashed":
+            self._schedule_after_failure(f"worker {pid} crashed")
+        else:
+            self._schedule_spawn(0.0)
+
+    def _schedule_spawn(self, delay):
+        if self._closed:
+            return
+        with self._spawn_cond:
+            heapq.heappush(self._spawn_due, time.monotonic() + delay)
+            self._spawn_cond.notify_all()
+
+    def _schedule_after_failure(self, reason):
+        with self._lock:
+            self._failures += 1
+            failures = self._failures
+        if failures > self.max_restart_failures:
+            logging.error(f"Render pool: {failures} worker failures in a row ({reason}); not restarting")
+            self._give_up_if_empty(reason)
+            return
+        delay = min(self.max_restart_backoff, self.restart_backoff * 2 ** (failures - 1))
+        logging.warning(f"Render pool: {reason}; restarting in {delay:.1f}s")
+        self._schedule_spawn(delay)
+
+    def _give_up_if_empty(self, reason):
+        with self._lock:
+            if self._procs or self._spawn_due:
+                return
+            self._broken = reason
+            leftovers = list(self._futures.items())
+        for job_id, _ in leftovers:
+            self._finish(job_id, exc=RenderPoolClosed(f"RenderPool has no workers left: {reason}"))
+
+    def _spawn_loop(self):
+        """
+        Start scheduled replacement workers off the supervisor thread.
+        """
+        while True:
+            with self._spawn_cond:
+                while not self._closed and (not self._spawn_due or self._spawn_due[0] > time.monotonic()):
+                    timeout = self._spawn_due[0] - time.monotonic() if self._spawn_due else None
+                    self._spawn_cond.wait(timeout)
+                if self._closed:
+                    return
+                heapq.heappop(self._spawn_due)
+            try:
+                self._spawn()
+            except Exception as e:
+                with self._lock:
+                    self._stats["spawn_failures"] += 1
+                self._schedule_after_failure(f"spawn failed: {e!r}")
+
+    def _supervise(self):
+        while not (self._closed and not self._procs):
+            try:
+                kind, pid, job_id, payload = self._result_q.get(timeout=0.1)
+            except queue.Empty:
+                kind = None
+            except (EOFError, OSError):
+                break
+
+            if kind == "start":
+                with self._lock:
+                    self._running[job_id] = (pid, time.monotonic() + self.job_timeout)
+            elif kind == "ok":
+                self._finish(job_id, result=payload)
+            elif kind == "error":
+                self._finish(job_id, exc=RuntimeError(payload))
+            elif kind == "exit":
+                if self._closed:
+                    with self._lock:
+                        self._procs.pop(pid, None)
+                else:
+                    self._replace(pid, "recycled")
+            elif kind == "ready":
+                with self._lock:
+                    self._failures = 0
+            elif kind == "crash":
+                logging.error(f"Render worker {pid} failed to start: {payload}")
+                self._replace(pid, "crashed")
+
+            self._check_timeouts()
+            self._check_dead()
+
+    def _check_timeouts(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [(j, wpid) for j, (wpid, deadline) in self._running.items() if deadline < now]
+        for job_id, pid in expired:
+            proc = self._procs.get(pid)
+            if proc is not None:
+                proc.terminate()
+            with self._lock:
+                self._stats["timeouts"] += 1
+            self._finish(job_id, exc=TimeoutError(f"render exceeded {self.job_timeout}s"))
+            self._replace(pid, "killed")
+
+    def _check_dead(self):
+        if self._closed:
+            return
+        with self._lock:
+            dead = [pid for pid, p in self._procs.items() if not p.is_alive() and p.exitcode not in (None, 0)]
+        for pid in dead:
+            logging.warning(f"Render worker {pid} died unexpectedly")
+            self._replace(pid, "crashed")
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    import argparse
+    import random
+    from concurrent.futures import ThreadPoolExecutor
+
+    from load_test import random_user_data
+    from llm_backend import LocalBackend, set_backend
+    from resume_generator import generate_resume
+    from pdf_util import generate_resume_pdf
+
+    parser = argparse.ArgumentParser(description="Thread vs process-pool PDF render throughput")
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    set_backend(LocalBackend())
+    rnd = random.Random(0)
+    texts = [generate_resume(random_user_data(rnd)) for _ in range(20)]
+    jobs = [texts[i % len(texts)] for i in range(args.jobs)]
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(args.workers) as tp:
+        list(tp.map(generate_resume_pdf, jobs))
+    threaded = time.perf_counter() - t0
+
+    with RenderPool(workers=args.workers) as pool:
+        pool.render(jobs[0])  # wait for workers to come up
+        t0 = time.perf_counter()
+        for f in [pool.submit(t) for t in jobs]:
+            f.result()
+        pooled = time.perf_counter() - t0
+        print(pool.stats())
+
+    print(f"{args.jobs} renders, {args.workers} workers on {os.cpu_count()} cores")
+    print(f"threads: {args.jobs / threaded:8.1f} PDFs/s")
+    print(f"pool:    {args.jobs / pooled:8.1f} PDFs/s")
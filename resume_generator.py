@@ -3,56 +3,240 @@ import os
 import time
 import logging
 import re
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait, FIRST_COMPLETED
 from dotenv import load_dotenv
-from openai import OpenAI
 
-from prompts import resume_system_prompt, enrichment_prompt_prefix
+from prompts import (
+    resume_system_prompt,
+    resume_user_template,
+    low_experience_note,
+    enrichment_system_prompt,
+    enrichment_user_template,
+)
 from skill_expander import expand_skills
+from llm_backend import get_backend, rule_based_bullets, is_rate_limit_error, LocalBackend
+from rate_limiter import current_priority, request_priority, RateLimitTimeout
+from profiling import profiled
 
-# Load API key
+# Load API key (the backend itself is chosen by LLM_BACKEND, see llm_backend.py)
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 PRIMARY_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 FALLBACK_MODEL = "gpt-3.5-turbo"
 
+# Hedging: if a call is still running after the stage's observed p95 (or
+# LLM_HEDGE_DELAY_S until enough samples exist), send a duplicate to
+# LLM_HEDGE_MODEL and take whichever answers first. Set LLM_HEDGE_MODEL to the
+# primary model to hedge on a second replica instead of the fallback model.
+HEDGE_ENABLED = os.getenv("LLM_HEDGE", "0").lower() in ("1", "true", "yes")
+HEDGE_MODEL = os.getenv("LLM_HEDGE_MODEL", FALLBACK_MODEL)
+HEDGE_DELAY_S = float(os.getenv("LLM_HEDGE_DELAY_S", "4"))
+HEDGE_MIN_SAMPLES = 20
+
+# Per-stage time budgets for generate_resume (seconds, 0 = unbounded)
+STAGE_BUDGETS = {
+    "skills": float(os.getenv("STAGE_BUDGET_SKILLS_S", "10")),
+    "enrich": float(os.getenv("STAGE_BUDGET_ENRICH_S", "25")),
+    "resume": float(os.getenv("STAGE_BUDGET_RESUME_S", "60")),
+}
+
+# Roles generated at once by generate_resume_variants (the roles are user input)
+MAX_VARIANT_WORKERS = int(os.getenv("VARIANT_WORKERS", "4"))
+
+# Optional callback(stage, ms) for waits outside the model call itself:
+# "llm.limiter_wait" (rate-limit budget) and "llm.queue_wait" (thread start).
+_stage_observer = None
+
+
+def set_stage_observer(fn):
+    """
+    Register callback(stage, ms) for LLM wait stages (None to remove).
+    """
+    global _stage_observer
+    _stage_observer = fn
+
+
+def _observe(stage, seconds):
+    if _stage_observer is not None:
+        _stage_observer(stage, seconds * 1000)
+
 
 # ---------------------------------------------------------------------------
 # Helper functions
 # ---------------------------------------------------------------------------
 
-def _call_chat(messages, model=PRIMARY_MODEL, max_retries=2, temperature=0.6, max_tokens=900):
+class _StageLatency:
+    """
+    Recent successful call latencies per stage, for hedge delays.
+    """
+
+    def __init__(self, window=200):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self._samples[stage].append(seconds)
+
+    def p95(self, stage):
+        with self._lock:
+            samples = sorted(self._samples[stage])
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[int(0.95 * (len(samples) - 1))]
+
+
+_stage_latency = _StageLatency()
+_hedge_lock = threading.Lock()
+_hedge_stats = {"calls": 0, "hedged": 0, "hedge_wins": 0, "deadline_exceeded": 0}
+
+
+def get_hedge_stats() -> dict:
+    with _hedge_lock:
+        return dict(_hedge_stats)
+
+
+def _bump(key):
+    with _hedge_lock:
+        _hedge_stats[key] += 1
+
+
+def _remaining(deadline):
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def _in_thread(fn, *args, **kwargs):
+    """
+    Run fn on its own daemon thread and return a Future. Deadline-bound calls
+    are not queued FIFO behind each other in a bounded pool; any waiting for
+    rate-limit budget happens in the limiter's priority queue (see _submit).
+    """
+    # worker threads don't inherit the caller's rate-limit priority
+    priority = current_priority()
+    fut = Future()
+    submitted = time.monotonic()
+
+    def run():
+        _observe("llm.queue_wait", time.monotonic() - submitted)
+        if not fut.set_running_or_notify_cancel():
+            return
+        try:
+            with request_priority(priority):
+                fut.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            fut.set_exception(e)
+
+    threading.Thread(target=run, name="llm-call", daemon=True).start()
+    return fut
+
+
+def _submit(backend, messages, model, temperature, max_tokens, budget_timeout=None):
+    """
+    Start one model call. A rate-limited backend's budget is taken here, in the
+    caller's thread and priority, before the call thread starts; raises
+    RateLimitTimeout (a TimeoutError) if none frees up within `budget_timeout`.
+    """
+    if hasattr(backend, "reserve"):
+        start = time.monotonic()
+        reserved = backend.reserve(messages, max_tokens, timeout=budget_timeout)
+        _observe("llm.limiter_wait", time.monotonic() - start)
+        return _in_thread(backend.chat_reserved, reserved, messages, model, temperature, max_tokens)
+    return _in_thread(backend.chat, messages, model=model, temperature=temperature, max_tokens=max_tokens)
+
+
+def _hedged_chat(backend, messages, model, temperature, max_tokens, stage, deadline):
+    """
+    One logical call: primary request, an optional hedge after the stage's
+    p95, first success wins. Raises TimeoutError once `deadline` passes.
+    """
+    _bump("calls")
+    start = time.monotonic()
+    if not HEDGE_ENABLED and deadline is None:
+        text = backend.chat(messages, model=model, temperature=temperature, max_tokens=max_tokens)
+        _stage_latency.add(stage, time.monotonic() - start)
+        return text
+
+    try:
+        primary = _submit(backend, messages, model, temperature, max_tokens, budget_timeout=_remaining(deadline))
+    except RateLimitTimeout:
+        _bump("deadline_exceeded")
+        raise TimeoutError(f"{stage} call got no rate-limit budget before its deadline")
+    pending = {primary}
+    if HEDGE_ENABLED:
+        delay = _stage_latency.p95(stage) or HEDGE_DELAY_S
+        remaining = _remaining(deadline)
+        done, _ = wait(pending, timeout=delay if remaining is None else max(0.0, min(delay, remaining)))
+        if not done and (remaining is None or remaining > delay):
+            try:
+                # hedge only with budget to spare; never queue for it
+                pending.add(_submit(backend, messages, HEDGE_MODEL, temperature, max_tokens, budget_timeout=0))
+                _bump("hedged")
+            except RateLimitTimeout:
+                pass
+
+    last_exc = None
+    while pending:
+        remaining = _remaining(deadline)
+        if remaining is not None and remaining <= 0:
+            break
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for fut in done:
+            if fut.exception() is None:
+                for other in pending:
+                    other.cancel()  # a request already in flight finishes in the background; its result is dropped
+                if fut is not primary:
+                    _bump("hedge_wins")
+                _stage_latency.add(stage, time.monotonic() - start)
+                return fut.result()
+            last_exc = fut.exception()
+    if pending or last_exc is None:
+        for other in pending:
+            other.cancel()
+        _bump("deadline_exceeded")
+        raise TimeoutError(f"{stage} call exceeded its deadline")
+    raise last_exc
+
+
+def _call_chat(messages, model=PRIMARY_MODEL, max_retries=2, temperature=0.6, max_tokens=900,
+               stage="chat", deadline=None):
     """
-    Wrapper for OpenAI chat calls with retry + fallback handling.
+    Wrapper for chat calls with retry + fallback handling.
+    `deadline` is a time.monotonic() value; past it a TimeoutError is raised.
     """
+    backend = get_backend()
     last_exc = None
     for attempt in range(max_retries):
         try:
-            resp = client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
-            )
-            return resp.choices[0].message.content.strip()
+            return _hedged_chat(backend, messages, model, temperature, max_tokens, stage, deadline)
+        except TimeoutError:
+            raise
         except Exception as e:
             logging.warning(f"⚠️ Attempt {attempt+1} failed: {e}")
             last_exc = e
-            time.sleep(1 + attempt * 2)
+            # a rate limiter already pauses every caller after a 429; don't also sleep here
+            if not (is_rate_limit_error(e) and hasattr(backend, "limiter")):
+                pause = 1 + attempt * 2
+                remaining = _remaining(deadline)
+                if remaining is not None and remaining <= pause:
+                    raise TimeoutError(f"{stage} call exceeded its deadline") from e
+                time.sleep(pause)
 
     try:
-        resp = client.chat.completions.create(
-            model=FALLBACK_MODEL,
-            messages=messages,
-            temperature=temperature,
-            max_tokens=max_tokens,
-        )
-        return resp.choices[0].message.content.strip()
+        return _hedged_chat(backend, messages, FALLBACK_MODEL, temperature, max_tokens, stage, deadline)
+    except TimeoutError:
+        raise
     except Exception as e:
         logging.error("Fallback also failed", exc_info=e)
         raise last_exc or e
 
 
+def _stage_deadline(stage):
+    budget = STAGE_BUDGETS.get(stage) or 0
+    return time.monotonic() + budget if budget > 0 else None
+
+
 def _infer_seniority(user_inputs: dict) -> str:
     """
     Estimate seniority level based on explicit selection or experience content.
@@ -109,13 +293,10 @@ def _clean_md(md: str) -> str:
     return "\n".join(out).strip()
 
 
-def _enrich_experience(raw_experience: str, target_role: str, seniority: str, skills: str) -> str:
+def _group_experience(raw_experience: str) -> list:
     """
-    Converts user’s raw text experience into strong, measurable bullet points.
+    Split raw experience text into per-job groups: [header line, bullet lines...].
     """
-    if not raw_experience.strip():
-        return ""
-
     lines = [l.strip() for l in re.split(r"\n+", raw_experience) if l.strip()]
     grouped = []
     current = []
@@ -128,32 +309,44 @@ def _enrich_experience(raw_experience: str, target_role: str, seniority: str, sk
             current.append(l)
     if current:
         grouped.append(current)
+    return grouped
+
+
+def _enrich_experience(raw_experience: str, target_role: str, seniority: str, skills: str,
+                       deadline=None, grouped=None) -> str:
+    """
+    Converts user’s raw text experience into strong, measurable bullet points.
+    Groups still pending when `deadline` passes fall back to local bullets.
+    `grouped` takes a precomputed _group_experience() result.
+    """
+    if not raw_experience.strip():
+        return ""
+
+    if grouped is None:
+        grouped = _group_experience(raw_experience)
 
     enriched_sections = []
     for group in grouped:
         header = group[0] if group else ""
         raw_lines = "\n".join(group[1:]) if len(group) > 1 else "\n".join(group)
 
-        prompt = enrichment_prompt_prefix.format(seniority=seniority, role=target_role, skills=skills)
-        prompt += "\nRAW:\n"
+        prompt = enrichment_user_template.format(seniority=seniority, role=target_role, skills=skills)
         for rl in raw_lines.split("\n"):
             if rl.strip():
                 prompt += f"- {rl.strip()}\n"
 
         messages = [
-            {"role": "system", "content": "You rewrite experience lines into professional, metrics-based bullets."},
+            {"role": "system", "content": enrichment_system_prompt},
             {"role": "user", "content": prompt}
         ]
 
         try:
-            out = _call_chat(messages, temperature=0.35, max_tokens=400)
+            remaining = _remaining(deadline)
+            if remaining is not None and remaining <= 0:
+                raise TimeoutError("enrichment budget exhausted")
+            out = _call_chat(messages, temperature=0.35, max_tokens=400, stage="enrich", deadline=deadline)
         except Exception:
-            bullets = []
-            for rl in raw_lines.split("\n"):
-                t = rl.strip().lstrip("-•")
-                if t:
-                    bullets.append(f"• {t}")
-            out = "\n".join(bullets)
+            out = rule_based_bullets(raw_lines)
 
         section_text = header + "\n" + out
         enriched_sections.append(section_text.strip())
@@ -165,28 +358,70 @@ def _enrich_experience(raw_experience: str, target_role: str, seniority: str, sk
 # Main function
 # ---------------------------------------------------------------------------
 
-def generate_resume(user_inputs: dict) -> str:
+def _prepare_inputs(user_inputs: dict) -> dict:
     """
-    Generate a professional, ATS-friendly Markdown resume.
+    Role-independent part of generation: form fields, seniority and the
+    experience timeline. Computed once and shared by every role variant.
     """
-    name = user_inputs.get("name", "")
-    target_role = user_inputs.get("target_role", "")
-    skills = user_inputs.get("skills", "")
     experience = user_inputs.get("experience", "")
-    projects = user_inputs.get("projects", "")
-    education = user_inputs.get("education", "")
-    achievements = user_inputs.get("achievements", "")
-    contact = user_inputs.get("contact", "")
-    email = user_inputs.get("email", "")
     linkedin = user_inputs.get("linkedin", "")
     github = user_inputs.get("github", "")
     portfolio = user_inputs.get("portfolio", "")
 
-    seniority = _infer_seniority(user_inputs)
+    links = []
+    if linkedin:
+        links.append(f"[LinkedIn]({linkedin})")
+    if github:
+        links.append(f"[GitHub]({github})")
+    if portfolio:
+        links.append(f"[Portfolio]({portfolio})")
 
-    # Expand skills
+    return {
+        "name": user_inputs.get("name", ""),
+        "skills": user_inputs.get("skills", ""),
+        "experience": experience,
+        "projects": user_inputs.get("projects", ""),
+        "education": user_inputs.get("education", ""),
+        "achievements": user_inputs.get("achievements", ""),
+        "contact": user_inputs.get("contact", ""),
+        "email": user_inputs.get("email", ""),
+        "linkedin": linkedin,
+        "github": github,
+        "links": links,
+        "seniority": _infer_seniority(user_inputs),
+        "experience_groups": _group_experience(experience) if experience.strip() else [],
+    }
+
+
+def _generate_for_role(prep: dict, target_role: str, details: dict = None) -> str:
+    """
+    Role-dependent part of generation: skill expansion, enrichment and the
+    final resume call for one target role. If given, `details` receives the
+    merged skill list under "all_skills".
+    """
+    name = prep["name"]
+    skills = prep["skills"]
+    experience = prep["experience"]
+    projects = prep["projects"]
+    education = prep["education"]
+    achievements = prep["achievements"]
+    contact = prep["contact"]
+    email = prep["email"]
+    linkedin = prep["linkedin"]
+    github = prep["github"]
+    links = prep["links"]
+    seniority = prep["seniority"]
+
+    # Expand skills (bounded by the skills stage budget)
     try:
-        expanded = expand_skills(skills, target_role) if skills else ""
+        if skills:
+            fut = _in_thread(expand_skills, skills, target_role)
+            expanded = fut.result(timeout=STAGE_BUDGETS["skills"] or None)
+        else:
+            expanded = ""
+    except FutureTimeout:
+        logging.warning("Skill expansion exceeded its budget; continuing without it")
+        expanded = ""
     except Exception:
         expanded = ""
 
@@ -201,51 +436,54 @@ def generate_resume(user_inputs: dict) -> str:
                 dedup.append(s)
                 seen.add(key)
         all_skills = ", ".join(dedup)
+    if details is not None:
+        details["all_skills"] = all_skills
 
     # Enrich experience
-    enriched_exp = _enrich_experience(experience, target_role, seniority, all_skills)
+    enriched_exp = _enrich_experience(experience, target_role, seniority, all_skills,
+                                      deadline=_stage_deadline("enrich"),
+                                      grouped=prep["experience_groups"])
 
     # Detect low experience (NEW)
     is_low_exp = not enriched_exp.strip() or len(enriched_exp.split()) < 80
 
     # Header line
-    links = []
-    if linkedin:
-        links.append(f"[LinkedIn]({linkedin})")
-    if github:
-        links.append(f"[GitHub]({github})")
-    if portfolio:
-        links.append(f"[Portfolio]({portfolio})")
-
     header_parts = [name, target_role, contact or "", email]
     header = " | ".join([p for p in header_parts if p])
     if links:
         header += " | " + " | ".join(links)
 
-    # Full prompt
-    instruction = resume_system_prompt + "\n\n"
-    instruction += f"USER DATA:\nName: {name}\nRole: {target_role}\nSeniority: {seniority}\n"
-    instruction += f"Contact: {contact}\nEmail: {email}\nSkills: {all_skills}\n"
-    instruction += f"Education: {education}\nAchievements: {achievements}\nProjects: {projects}\n\n"
-    instruction += "Use the provided enriched experience below for the 'Professional Experience' section.\n\n"
-    instruction += "ENRICHED EXPERIENCE:\n" + (enriched_exp or experience or "No experience provided.\n")
+    # Full prompt: the static system prompt is the cacheable prefix, all
+    # per-user data goes into the trailing user message.
+    instruction = resume_user_template.format(
+        name=name,
+        role=target_role,
+        seniority=seniority,
+        contact=contact,
+        email=email,
+        skills=all_skills,
+        education=education,
+        achievements=achievements,
+        projects=projects,
+        experience=enriched_exp or experience or "No experience provided.\n",
+    )
 
     # NEW: if low experience, tell GPT to fill page naturally
     if is_low_exp:
-        instruction += (
-            "\n\nNOTE: The candidate has limited professional experience. "
-            "Make sure the resume still looks like a full, rich one-page professional document. "
-            "Expand the Professional Summary with technical exposure, teamwork, learning attitude, and relevant projects. "
-            "Add more detail to Technical Skills and Projects/Achievements to ensure the layout fills one page naturally "
-            "but does not exceed one page. Keep the same section structure and formatting."
-        )
+        instruction += low_experience_note
 
     messages = [
-        {"role": "system", "content": "You are a world-class resume writer specialized in software roles."},
+        {"role": "system", "content": resume_system_prompt},
         {"role": "user", "content": instruction},
     ]
 
-    result = _call_chat(messages, temperature=0.35, max_tokens=1200)
+    try:
+        result = _call_chat(messages, temperature=0.35, max_tokens=1200,
+                            stage="resume", deadline=_stage_deadline("resume"))
+    except TimeoutError:
+        # Out of time: assemble the page locally from the same prompt data
+        logging.warning("Resume generation exceeded its budget; using local assembly")
+        result = LocalBackend(latency_ms=0, error_rate=0).respond(messages)
     result = result.replace("\r\n", "\n")
     result = _clean_md(result)
 
@@ -272,22 +510,51 @@ def generate_resume(user_inputs: dict) -> str:
             result = result.replace(edu_text, formatted_edu.strip())
 
     # --- Force header overwrite every time (fixes stale name/email issue) ---
-# Remove any first-line name/header GPT may have added
-# --- Force header overwrite every time (fixes stale name/email issue) ---
-# Remove any first-line name/header GPT may have added
-result = re.sub(r'^[^\n]*\n+', '', result)
+    # Remove any first-line name/header GPT may have added
+    result = re.sub(r'^[^\n]*\n+', '', result)
 
-# Add our exact header line
-result = header + "\n\n" + result
+    # Add our exact header line
+    result = header + "\n\n" + result
 
-# (Optional cleanup to remove any old cached personal data)
-result = re.sub(r'(?i)shubham\s+shrotriya', name, result)
-result = re.sub(r'shubhamshrotriya[0-9]*@gmail\.com', email, result)
-result = re.sub(r'https://(www\.)?linkedin\.com/in/[^\s\)]*', linkedin or '', result)
-result = re.sub(r'https://github\.com/[^\s\)]*', github or '', result)
+    # (Optional cleanup to remove any old cached personal data)
+    result = re.sub(r'(?i)shubham\s+shrotriya', name, result)
+    result = re.sub(r'shubhamshrotriya[0-9]*@gmail\.com', email, result)
+    result = re.sub(r'https://(www\.)?linkedin\.com/in/[^\s\)]*', linkedin or '', result)
+    result = re.sub(r'https://github\.com/[^\s\)]*', github or '', result)
 
-return result
+    return result
 
 
+@profiled(skip_args=("details",))
+def generate_resume(user_inputs: dict, details: dict = None) -> str:
+    """
+    Generate a professional, ATS-friendly Markdown resume.
+    Pass a dict as `details` to get the merged "all_skills" list back.
+    """
+    return _generate_for_role(_prepare_inputs(user_inputs), user_inputs.get("target_role", ""), details)
 
 
+@profiled(skip_args=("details",))
+def generate_resume_variants(user_inputs: dict, target_roles: list, details: dict = None) -> dict:
+    """
+    Generate one resume per target role. Parsed inputs, seniority and the
+    experience timeline are computed once; the role-dependent LLM stages run
+    concurrently per role. Returns {role: markdown} in the given role order;
+    `details`, if given, is filled with {role: {"all_skills": ...}}.
+    """
+    roles = list(dict.fromkeys(r.strip() for r in target_roles if r and r.strip()))
+    if not roles:
+        roles = [user_inputs.get("target_role", "")]
+    prep = _prepare_inputs(user_inputs)
+
+    priority = current_priority()
+
+    def run(role):
+        role_details = details.setdefault(role, {}) if details is not None else None
+        with request_priority(priority):
+            return _generate_for_role(prep, role, role_details)
+
+    # each role's worker starts its own LLM threads, so the role count is not the thread count
+    with ThreadPoolExecutor(max_workers=min(len(roles), MAX_VARIANT_WORKERS), thread_name_prefix="variant") as pool:
+        futures = {role: pool.submit(run, role) for role in roles}
+        return {role: fut.result() for role, fut in futures.items()}
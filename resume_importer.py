@@ -0,0 +1,446 @@
+# resume_importer.py — prefill the form from an existing resume PDF
+"""
+Reads an uploaded resume PDF with pypdf and splits it into the app's form
+fields (name, contact, email, links, target_role, education, experience,
+projects, skills, achievements).
+
+Extraction is lazy and bounded, so a huge or hostile upload cannot stall a
+session:
+- uploads above IMPORT_MAX_MB are rejected before parsing
+- only the first IMPORT_MAX_PAGES pages are loaded and extracted
+- each page's content streams, and the form XObjects they draw, are decoded
+  with an output cap first, and a page whose decoded content exceeds
+  IMPORT_MAX_STREAM_MB is skipped (zip bombs). Every stage of a filter chain
+  is capped; filters without a bounded decoder (LZW, predictors) skip the page
+- extraction stops once IMPORT_MAX_CHARS characters have been collected or
+  IMPORT_TIMEOUT_S has passed
+
+import_resume_async() runs the import on a small background pool so the
+Streamlit script thread only waits on a Future with a timeout.
+
+Section splitting follows the headings the generator emits (PROFESSIONAL
+SUMMARY, TECHNICAL SKILLS, PROFESSIONAL EXPERIENCE, EDUCATION, PROJECTS /
+CERTIFICATIONS / ACHIEVEMENTS) plus common variants used by other resumes.
+
+Run `python resume_importer.py` for an extraction-latency benchmark.
+"""
+import io
+import os
+import re
+import time
+import zlib
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from pypdf import PdfReader
+from pypdf.filters import ASCIIHexDecode, ASCII85Decode, RunLengthDecode
+from pypdf.generic import ArrayObject, DictionaryObject
+
+
+MAX_UPLOAD_BYTES = int(float(os.getenv("IMPORT_MAX_MB", "10")) * 1024 * 1024)
+MAX_PAGES = int(os.getenv("IMPORT_MAX_PAGES", "3"))
+MAX_STREAM_BYTES = int(float(os.getenv("IMPORT_MAX_STREAM_MB", "4")) * 1024 * 1024)
+MAX_CHARS = int(os.getenv("IMPORT_MAX_CHARS", "50000"))
+IMPORT_TIMEOUT_S = float(os.getenv("IMPORT_TIMEOUT_S", "10"))
+
+
+class ResumeImportError(ValueError):
+    """
+    Raised when an upload is too large, not a PDF, or has no extractable text.
+    """
+
+
+# ---------------------------------------------------------------------------
+# Bounded, lazy extraction
+# ---------------------------------------------------------------------------
+
+def _read_upload(source) -> bytes:
+    """
+    Bytes of `source` (bytes, path or file-like), refusing anything over MAX_UPLOAD_BYTES.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        data = bytes(source)
+    elif isinstance(source, str):
+        if os.path.getsize(source) > MAX_UPLOAD_BYTES:
+            raise ResumeImportError(f"PDF is larger than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+        with open(source, "rb") as f:
+            data = f.read(MAX_UPLOAD_BYTES + 1)
+    else:
+        if hasattr(source, "seek"):
+            source.seek(0)
+        data = source.read(MAX_UPLOAD_BYTES + 1)
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise ResumeImportError(f"PDF is larger than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+    if not data.lstrip()[:5] == b"%PDF-":
+        raise ResumeImportError("Upload is not a PDF")
+    return data
+
+
+_FLATE = ("/FlateDecode", "/Fl")
+# filter: (decoder, worst-case output bytes per input byte)
+_BOUNDED_FILTERS = {
+    "/ASCIIHexDecode": (ASCIIHexDecode, 1), "/AHx": (ASCIIHexDecode, 1),
+    "/ASCII85Decode": (ASCII85Decode, 4), "/A85": (ASCII85Decode, 4),
+    "/RunLengthDecode": (RunLengthDecode, 64), "/RL": (RunLengthDecode, 64),
+}
+_DO = re.compile(rb"/([^\s/\[\]()<>{}%]+)\s+Do\b")
+_NAME_ESCAPE = re.compile(rb"#([0-9A-Fa-f]{2})")
+_MAX_FORM_DEPTH = 8
+
+
+def _decode_capped(stream, limit):
+    """
+    Decoded bytes of `stream`, or None if any stage of its filter chain would
+    produce more than `limit` bytes or has no capped decoder.
+    """
+    filters = stream.get("/Filter")
+    names = [] if filters is None else list(filters) if isinstance(filters, ArrayObject) else [filters]
+    parms = stream.get("/DecodeParms")
+    parms = list(parms) if isinstance(parms, ArrayObject) else [parms] * len(names)
+    data = stream._data
+    if len(data) > limit:
+        return None
+    for name, parm in zip(names, parms):
+        parm = parm.get_object() if parm is not None else None
+        if name in _FLATE:
+            if isinstance(parm, DictionaryObject) and parm.get("/Predictor", 1) > 1:
+                return None
+            try:
+                data = zlib.decompressobj().decompress(data, limit + 1)
+            except zlib.error:
+                return None
+        elif name in _BOUNDED_FILTERS:
+            decoder, ratio = _BOUNDED_FILTERS[name]
+            if len(data) * ratio > limit:
+                return None
+            data = decoder.decode(data)
+        else:
+            return None
+        if len(data) > limit:
+            return None
+    return data
+
+
+def _within_budget(contents, resources, times, budget, deadline, depth) -> bool:
+    """
+    Charge `times` x the decoded size of `contents`, and of the form XObjects
+    it draws, against budget[0]. False once the budget or deadline runs out.
+    """
+    if contents is None:
+        return True
+    if depth > _MAX_FORM_DEPTH or time.monotonic() > deadline:
+        return False
+    contents = contents.get_object()
+    streams = contents if isinstance(contents, ArrayObject) else [contents]
+    uses = Counter()
+    for ref in streams:
+        data = _decode_capped(ref.get_object(), budget[0] // times)
+        if data is None:
+            return False
+        budget[0] -= len(data) * times
+        uses.update(_NAME_ESCAPE.sub(lambda m: bytes([int(m.group(1), 16)]), m.group(1))
+                    for m in _DO.finditer(data))
+    xobjects = resources.get_object().get("/XObject") if resources is not None else None
+    if not uses or xobjects is None:
+        return True
+    xobjects = xobjects.get_object()
+    for name, count in uses.items():
+        xobj = xobjects.get("/" + name.decode("latin-1"))
+        if xobj is None:
+            continue
+        xobj = xobj.get_object()
+        if xobj.get("/Subtype") != "/Form":
+            continue   # images are not decoded by extract_text
+        if not _within_budget(xobj, xobj.get("/Resources", resources), times * count, budget, deadline, depth + 1):
+            return False
+    return True
+
+
+def _content_within_limit(page, deadline=None) -> bool:
+    """
+    False if the page's content streams, plus every form XObject drawn from
+    them (once per use), decode past MAX_STREAM_BYTES, use a filter we cannot
+    decode with a cap, or the check itself runs past `deadline`.
+    """
+    deadline = float("inf") if deadline is None else deadline
+    return _within_budget(page.get("/Contents"), page.get("/Resources"), 1, [MAX_STREAM_BYTES], deadline, 0)
+
+
+def _open_reader(source) -> PdfReader:
+    try:
+        reader = PdfReader(io.BytesIO(_read_upload(source)), strict=False)
+        if reader.is_encrypted:
+            reader.decrypt("")
+        return reader
+    except ResumeImportError:
+        raise
+    except Exception as e:
+        raise ResumeImportError(f"Could not read PDF: {e}") from e
+
+
+def _iter_reader_pages(reader, max_pages, max_chars, deadline):
+    try:
+        page_count = len(reader.pages)
+    except Exception as e:
+        raise ResumeImportError(f"Could not read PDF: {e}") from e
+
+    collected = 0
+    for i in range(min(page_count, max_pages)):
+        if time.monotonic() > deadline:
+            logging.warning(f"PDF import stopped at page {i + 1}: time budget exhausted")
+            return
+        try:
+            page = reader.pages[i]
+            if not _content_within_limit(page, deadline):
+                logging.warning(f"PDF import skipped page {i + 1}: content stream too large")
+                continue
+            text = page.extract_text() or ""
+        except Exception as e:
+            logging.warning(f"PDF import skipped page {i + 1}: {e}")
+            continue
+        text = text[:max_chars - collected]
+        collected += len(text)
+        yield i + 1, text
+        if collected >= max_chars:
+            return
+
+
+def iter_page_text(source, max_pages=None, max_chars=None, timeout=None):
+    """
+    Yield (page number, text) for the first `max_pages` pages, lazily.
+    Oversized pages are skipped; iteration stops at `max_chars` or `timeout`.
+    """
+    max_pages = MAX_PAGES if max_pages is None else max_pages
+    max_chars = MAX_CHARS if max_chars is None else max_chars
+    deadline = time.monotonic() + (IMPORT_TIMEOUT_S if timeout is None else timeout)
+    yield from _iter_reader_pages(_open_reader(source), max_pages, max_chars, deadline)
+
+
+def _page_links(reader) -> list:
+    """
+    URI link targets on the first page (header links carry no URL in the text).
+    """
+    try:
+        annots = reader.pages[0].get("/Annots") or []
+        uris = []
+        for a in annots[:50]:
+            action = a.get_object().get("/A")
+            if action is not None and action.get_object().get("/URI"):
+                uris.append(str(action.get_object()["/URI"]))
+        return uris
+    except Exception:
+        return []
+
+
+# ---------------------------------------------------------------------------
+# Section splitting
+# ---------------------------------------------------------------------------
+
+SECTION_ALIASES = {
+    "summary": ("professional summary", "summary", "profile", "about me", "objective"),
+    "skills": ("technical skills", "skills", "core skills", "key skills", "technologies"),
+    "experience": ("professional experience", "experience", "work experience",
+                   "employment history", "work history"),
+    "education": ("education", "academic background"),
+    "projects": ("projects / certifications / achievements", "projects", "personal projects"),
+    "achievements": ("achievements", "certifications", "awards", "certifications & achievements"),
+}
+_HEADING_TO_FIELD = {alias: field for field, aliases in SECTION_ALIASES.items() for alias in aliases}
+
+_BULLET = re.compile(r"^\s*[•▪●◦\x7f*\-–]\s*")
+_DATE_RANGE = re.compile(r"\b(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec|\d{4})\b.*[–-]")
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_PHONE = re.compile(r"\+?\d[\d ()\-]{7,}\d")
+
+
+def _heading_field(line: str):
+    key = re.sub(r"\s+", " ", line.strip().rstrip(":").lower())
+    return _HEADING_TO_FIELD.get(key)
+
+
+def _join_wrapped(lines) -> list:
+    """
+    Re-join lines that the PDF wrapped mid-sentence (previous line ends with a comma).
+    """
+    out = []
+    for ln in lines:
+        if out and out[-1].endswith(",") and not _BULLET.match(ln):
+            out[-1] = f"{out[-1]} {ln}"
+        else:
+            out.append(ln)
+    return out
+
+
+def _format_experience(lines) -> str:
+    """
+    Rebuild "Company – Role | dates" headers and "- bullet" lines, the shape
+    resume_generator._group_experience expects.
+    """
+    out = []
+    for ln in lines:
+        if _BULLET.match(ln):
+            out.append("- " + _BULLET.sub("", ln))
+        elif _DATE_RANGE.search(ln) and out and not out[-1].startswith("- ") and not _DATE_RANGE.search(out[-1]):
+            out[-1] = f"{out[-1]} | {ln}"
+        else:
+            if out:
+                out.append("")
+            out.append(ln)
+    return "\n".join(out).strip()
+
+
+def _format_skills(lines) -> str:
+    skills = []
+    for ln in _join_wrapped(lines):
+        ln = _BULLET.sub("", ln)
+        if ":" in ln:
+            ln = ln.split(":", 1)[1]
+        skills += [s.strip() for s in ln.split(",") if s.strip()]
+    seen = set()
+    return ", ".join(s for s in skills if not (s.lower() in seen or seen.add(s.lower())))
+
+
+def split_sections(text: str, links=()) -> dict:
+    """
+    Map extracted resume text onto the app's form fields.
+    """
+    sections = {"header": []}
+    current = "header"
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        field = _heading_field(line)
+        if field:
+            current = field
+            sections.setdefault(current, [])
+            continue
+        sections.setdefault(current, []).append(line)
+
+    header = sections["header"]
+    header_text = " | ".join(header)
+    fields = {
+        "name": header[0].split("|")[0].strip() if header else "",
+        "target_role": "",
+        "email": "",
+        "contact": "",
+        "linkedin": "",
+        "github": "",
+        "portfolio": "",
+    }
+    if header and "|" in header[0]:
+        # Markdown-style "Name | Role | ..." header
+        fields["target_role"] = header[0].split("|")[1].strip()
+    elif len(header) > 1 and not _EMAIL.search(header[1]) and not _PHONE.search(header[1]):
+        fields["target_role"] = header[1].split("|")[0].strip()
+    m = _EMAIL.search(header_text)
+    if m:
+        fields["email"] = m.group(0)
+    m = _PHONE.search(header_text)
+    if m:
+        fields["contact"] = m.group(0).strip()
+    for uri in links:
+        low = uri.lower()
+        if low.startswith("mailto:"):
+            fields["email"] = fields["email"] or uri[7:]
+        elif low.startswith("tel:"):
+            fields["contact"] = fields["contact"] or uri[4:]
+        elif "linkedin" in low:
+            fields["linkedin"] = fields["linkedin"] or uri
+        elif "github" in low:
+            fields["github"] = fields["github"] or uri
+        elif low.startswith("http"):
+            fields["portfolio"] = fields["portfolio"] or uri
+
+    def bullets(name):
+        return "\n".join("- " + _BULLET.sub("", ln) if _BULLET.match(ln) else ln
+                         for ln in _join_wrapped(sections.get(name, [])))
+
+    fields["skills"] = _format_skills(sections.get("skills", []))
+    fields["experience"] = _format_experience(_join_wrapped(sections.get("experience", [])))
+    fields["education"] = "\n".join(_join_wrapped(sections.get("education", [])))
+    fields["projects"] = bullets("projects")
+    fields["achievements"] = bullets("achievements")
+    if fields["experience"] == "No experience provided.":
+        fields["experience"] = ""
+    return fields
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def import_resume(source, max_pages=None, timeout=None) -> dict:
+    """
+    Extract form fields from a resume PDF (bytes, path or file-like).
+    The result also carries `pages_read`.
+    """
+    reader = _open_reader(source)
+    deadline = time.monotonic() + (IMPORT_TIMEOUT_S if timeout is None else timeout)
+    pages = list(_iter_reader_pages(reader, MAX_PAGES if max_pages is None else max_pages, MAX_CHARS, deadline))
+    text = "\n".join(t for _, t in pages)
+    if not text.strip():
+        raise ResumeImportError("No extractable text found (scanned or image-only PDF?)")
+    fields = split_sections(text, _page_links(reader))
+    fields["pages_read"] = len(pages)
+    return fields
+
+
+_import_pool = ThreadPoolExecutor(max_workers=int(os.getenv("IMPORT_WORKERS", "2")),
+                                  thread_name_prefix="resume-import")
+
+
+def import_resume_async(source, max_pages=None, timeout=None):
+    """
+    Run import_resume on the background pool; returns a Future.
+    """
+    data = _read_upload(source)
+    return _import_pool.submit(import_resume, data, max_pages, timeout)
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    import random
+    import argparse
+    from pypdf import PdfWriter
+
+    from load_test import random_user_data
+    from llm_backend import LocalBackend, set_backend
+    from resume_generator import generate_resume
+    from pdf_util import generate_resume_pdf
+
+    parser = argparse.ArgumentParser(description="Resume PDF import latency on large files")
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    set_backend(LocalBackend(latency_ms=0, jitter_ms=0))
+    one_page = generate_resume_pdf(generate_resume(random_user_data(random.Random(0))))
+
+    def padded(n):
+        writer = PdfWriter()
+        page = PdfReader(io.BytesIO(one_page)).pages[0]
+        for _ in range(n):
+            writer.add_page(page)
+        buf = io.BytesIO()
+        writer.write(buf)
+        return buf.getvalue()
+
+    for n in args.pages:
+        data = padded(n)
+        t0 = time.perf_counter()
+        for _ in range(args.runs):
+            import_resume(data)
+        lazy = (time.perf_counter() - t0) * 1000 / args.runs
+
+        t0 = time.perf_counter()
+        full_runs = 1 if n > 50 else args.runs
+        for _ in range(full_runs):
+            reader = PdfReader(io.BytesIO(data))
+            "\n".join(p.extract_text() for p in reader.pages)
+        full = (time.perf_counter() - t0) * 1000 / full_runs
+        print(f"{n:4d} pages, {len(data) / 1024:8.1f} KiB: import {lazy:8.1f} ms   extract-all {full:9.1f} ms")
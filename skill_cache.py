@@ -0,0 +1,169 @@
+# skill_cache.py — normalised near-match cache for expand_skills
+"""
+Users type the same profile many ways ("Python, AWS, docker",
+"aws,python,Docker", "Python, AWS, Docker, Git"). Each variant used to be its
+own LLM call. SkillExpansionCache canonicalises skills and roles (lowercase,
+aliases, dedupe, sort) and reuses a prior expansion for the same role when the
+Jaccard similarity of the skill sets is at least `threshold`.
+
+  SKILL_CACHE_SIZE        max entries, LRU-evicted (default 512)
+  SKILL_CACHE_THRESHOLD   min Jaccard similarity for a near hit (default 0.75)
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+
+
+SKILL_ALIASES = {
+    "amazon web services": "aws",
+    "google cloud": "gcp",
+    "google cloud platform": "gcp",
+    "microsoft azure": "azure",
+    "k8s": "kubernetes",
+    "js": "javascript",
+    "ecmascript": "javascript",
+    "ts": "typescript",
+    "node": "node.js",
+    "nodejs": "node.js",
+    "node js": "node.js",
+    "reactjs": "react",
+    "react.js": "react",
+    "vuejs": "vue",
+    "vue.js": "vue",
+    "angularjs": "angular",
+    "angular.js": "angular",
+    "postgres": "postgresql",
+    "psql": "postgresql",
+    "mongo": "mongodb",
+    "golang": "go",
+    "py": "python",
+    "python3": "python",
+    "springboot": "spring boot",
+    "ci cd": "ci/cd",
+    "cicd": "ci/cd",
+    "ci-cd": "ci/cd",
+    "rest": "rest api",
+    "restful api": "rest api",
+    "restful apis": "rest api",
+    "rest apis": "rest api",
+    "ml": "machine learning",
+    "c sharp": "c#",
+    "csharp": "c#",
+    "cpp": "c++",
+}
+
+ROLE_ALIASES = {
+    "swe": "software engineer",
+    "sde": "software engineer",
+    "software developer": "software engineer",
+    "software development engineer": "software engineer",
+    "backend developer": "backend engineer",
+    "back end engineer": "backend engineer",
+    "back-end engineer": "backend engineer",
+    "frontend developer": "frontend engineer",
+    "front end engineer": "frontend engineer",
+    "front-end engineer": "frontend engineer",
+    "full stack developer": "full stack engineer",
+    "fullstack engineer": "full stack engineer",
+    "full-stack engineer": "full stack engineer",
+    "sre": "site reliability engineer",
+    "devops": "devops engineer",
+}
+
+_SENIORITY_WORDS = re.compile(r"\b(senior|sr|junior|jr|lead|principal|staff|mid|entry[- ]level|i{1,3})\b\.?")
+
+
+def canonical_skill(skill: str) -> str:
+    s = re.sub(r"\s+", " ", skill.strip().lower())
+    return SKILL_ALIASES.get(s, s)
+
+
+def canonical_skills(skills: str) -> frozenset:
+    """
+    Comma-separated skills -> deduplicated, alias-resolved set.
+    """
+    return frozenset(c for c in (canonical_skill(s) for s in skills.split(",")) if c)
+
+
+def canonical_role(role: str) -> str:
+    """
+    Lowercase, drop seniority words and resolve aliases ("Sr. SWE" -> "software engineer").
+    """
+    r = _SENIORITY_WORDS.sub(" ", (role or "").lower())
+    r = re.sub(r"\s+", " ", r).strip()
+    return ROLE_ALIASES.get(r, r)
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class SkillExpansionCache:
+    """
+    Thread-safe LRU of (role, skill set) -> expansion, with near-match lookup.
+    """
+
+    def __init__(self, max_size=None, threshold=None):
+        self.max_size = int(max_size if max_size is not None else os.getenv("SKILL_CACHE_SIZE", "512"))
+        self.threshold = float(threshold if threshold is not None else os.getenv("SKILL_CACHE_THRESHOLD", "0.75"))
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # (role, frozenset) -> expansion
+        self._stats = {"exact_hits": 0, "near_hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, skills: str, target_role: str = ""):
+        """
+        Return a cached expansion for an equal or similar profile, else None.
+        Skills the user already listed are dropped from a near hit's expansion.
+        """
+        role = canonical_role(target_role)
+        sset = canonical_skills(skills)
+        key = (role, sset)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._stats["exact_hits"] += 1
+                return self._entries[key]
+
+            best_key, best_sim = None, 0.0
+            for (r, s) in self._entries:
+                if r != role:
+                    continue
+                sim = jaccard(sset, s)
+                if sim > best_sim:
+                    best_key, best_sim = (r, s), sim
+            if best_key is not None and best_sim >= self.threshold:
+                self._entries.move_to_end(best_key)
+                self._stats["near_hits"] += 1
+                expansion = self._entries[best_key]
+            else:
+                self._stats["misses"] += 1
+                return None
+
+        kept = [s.strip() for s in expansion.split(",") if s.strip() and canonical_skill(s) not in sset]
+        return ", ".join(kept)
+
+    def put(self, skills: str, target_role: str, expansion: str):
+        key = (canonical_role(target_role), canonical_skills(skills))
+        with self._lock:
+            self._entries[key] = expansion
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            for k in self._stats:
+                self._stats[k] = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._stats)
+            out["size"] = len(self._entries)
+        lookups = out["exact_hits"] + out["near_hits"] + out["misses"]
+        out["hit_rate"] = (out["exact_hits"] + out["near_hits"]) / lookups if lookups else 0.0
+        return out
@@ -1,10 +1,14 @@
 # skill_expander.py — Updated for openai>=1.0.0
-import os
 from dotenv import load_dotenv
-from openai import OpenAI
+
+from prompts import skill_expansion_system_prompt, skill_expansion_user_template
+from llm_backend import get_backend, rule_based_skills
+from skill_cache import SkillExpansionCache
 
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+# Shared across sessions; near-identical profiles for the same role reuse one expansion
+skill_cache = SkillExpansionCache()
 
 def expand_skills(skills: str, target_role: str = "") -> str:
     """
@@ -14,33 +18,22 @@ def expand_skills(skills: str, target_role: str = "") -> str:
     if not skills:
         return ""
 
-    prompt = f"""
-User skills: {skills}
-Target role: {target_role}
+    cached = skill_cache.get(skills, target_role)
+    if cached is not None:
+        return cached
 
-Suggest 6–10 advanced or related professional skills, frameworks, or tools.
-Return as a comma-separated list only (no sentences).
-"""
+    # Static instructions first (cacheable prefix), user data last
+    messages = [
+        {"role": "system", "content": skill_expansion_system_prompt},
+        {"role": "user", "content": skill_expansion_user_template.format(skills=skills, role=target_role)},
+    ]
 
     try:
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.2,
-            max_tokens=150,
-        )
-        text = resp.choices[0].message.content.strip()
-        return text.replace("\n", " ").strip()
+        text = get_backend().chat(messages, model="gpt-4o-mini", temperature=0.2, max_tokens=150)
+        text = text.replace("\n", " ").strip()
+        skill_cache.put(skills, target_role, text)
+        return text
     except Exception as e:
         print("⚠️ Skill expansion failed:", e)
         # fallback suggestion logic
-        base = [s.strip().lower() for s in skills.split(",") if s.strip()]
-        extra = []
-        if "python" in ",".join(base):
-            extra += ["Django", "Flask", "FastAPI", "NumPy", "Pandas"]
-        if "java" in ",".join(base):
-            extra += ["Spring Boot", "Hibernate", "Maven", "Jenkins"]
-        if "aws" in ",".join(base):
-            extra += ["Docker", "Kubernetes", "Terraform", "CI/CD"]
-        return ", ".join(list(dict.fromkeys(extra)))
-
+        return rule_based_skills(skills)
@@ -0,0 +1,111 @@
+# stub_server.py — local OpenAI-compatible chat endpoint for offline testing
+"""
+Serves POST /v1/chat/completions using llm_backend.LocalBackend, so the real
+OpenAI client and HTTP path can be exercised without network access.
+
+Usage:
+    python stub_server.py --port 8008
+    LLM_BACKEND=stub streamlit run app.py
+
+The LOCAL_LLM_* variables (see llm_backend.py) control latency and error rate.
+"""
+import json
+import time
+import uuid
+import argparse
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm_backend import LocalBackend, LocalBackendError
+
+
+def _approx_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    backend = None  # set by make_server()
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            req = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body"}})
+            return
+
+        messages = req.get("messages") or []
+        try:
+            text = self.backend.chat(messages, model=req.get("model", "stub"))
+        except LocalBackendError as e:
+            self._send_json(500, {"error": {"message": str(e), "type": "server_error"}})
+            return
+
+        prompt_tokens = _approx_tokens("".join(m.get("content", "") for m in messages))
+        self._send_json(200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": req.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": _approx_tokens(text),
+                "total_tokens": prompt_tokens + _approx_tokens(text),
+                "prompt_tokens_details": {"cached_tokens": 0},
+            },
+        })
+
+    def log_message(self, fmt, *args):
+        logging.debug("stub_server: " + fmt, *args)
+
+
+def make_server(host="127.0.0.1", port=8008, backend=None) -> ThreadingHTTPServer:
+    """
+    Build (but do not start) a stub server bound to host:port.
+    """
+    handler = type("StubHandler", (_StubHandler,), {"backend": backend or LocalBackend()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_in_thread(host="127.0.0.1", port=0, backend=None):
+    """
+    Start a stub server on a background thread. Returns (server, base_url).
+    Port 0 picks a free port.
+    """
+    server = make_server(host, port, backend)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8008)
+    args = parser.parse_args()
+
+    srv = make_server(args.host, args.port)
+    print(f"Stub LLM server listening on http://{args.host}:{args.port}/v1")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,109 @@
+import time
+import threading
+
+import pytest
+
+from rate_limiter import RateLimiter, RateLimitTimeout, request_priority, current_priority
+from llm_backend import LLMBackend, RateLimitedBackend
+
+
+def _drained(rpm, batch_reserve=0.0):
+    limiter = RateLimiter(rpm=rpm, batch_reserve=batch_reserve)
+    with limiter._state.locked() as st:
+        st["requests"] = 0.0
+        st["ts"] = time.time()
+    return limiter
+
+
+def _acquire_in_thread(limiter, priority, order, waits):
+    def run():
+        waits[priority + str(len(waits))] = limiter.acquire(priority=priority, timeout=10)
+        order.append(priority)
+    t = threading.Thread(target=run)
+    t.start()
+    return t
+
+
+def test_interactive_served_before_queued_batch():
+    limiter = _drained(rpm=300)   # one request every 0.2 s
+    order, waits = [], {}
+    threads = [_acquire_in_thread(limiter, "batch", order, waits) for _ in range(4)]
+    time.sleep(0.05)
+    threads.append(_acquire_in_thread(limiter, "interactive", order, waits))
+    for t in threads:
+        t.join(5)
+
+    assert order[0] == "interactive"
+    assert sorted(order) == ["batch"] * 4 + ["interactive"]
+    stats = limiter.stats()
+    assert stats["interactive"]["acquired"] == 1
+    assert stats["interactive"]["wait_max_s"] < 0.5
+
+
+def test_batch_reserve_leaves_headroom_for_interactive():
+    limiter = RateLimiter(rpm=100, batch_reserve=0.2)
+    with limiter._state.locked() as st:
+        st["requests"] = 10.0    # below the 20-request reserve batch must leave
+        st["ts"] = time.time()
+
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(priority="batch", timeout=0.05)
+    assert limiter.acquire(priority="interactive", timeout=0.05) < 0.05
+    assert limiter.stats()["batch"]["timeouts"] == 1
+
+
+def test_batch_runs_when_above_reserve():
+    limiter = RateLimiter(rpm=100, batch_reserve=0.2)
+    assert limiter.acquire(priority="batch", timeout=0.05) < 0.05
+
+
+def test_large_batch_call_runs_on_full_bucket():
+    limiter = RateLimiter(rpm=3, tpm=2000, batch_reserve=0.2)
+    assert limiter.acquire(tokens=1700, priority="batch", timeout=0.05) < 0.05
+
+
+def test_penalize_blocks_all_priorities():
+    limiter = RateLimiter(rpm=1000)
+    limiter.penalize(10)
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(priority="interactive", timeout=0.05)
+
+
+def test_request_priority_is_thread_local_and_restored():
+    seen = []
+    with request_priority("batch"):
+        t = threading.Thread(target=lambda: seen.append(current_priority()))
+        t.start()
+        t.join()
+        assert current_priority() == "batch"
+    assert current_priority() == "interactive"
+    assert seen == ["interactive"]
+
+
+class _RateLimited(Exception):
+    status_code = 429
+
+    class response:
+        headers = {"retry-after": "7"}
+
+
+class _Failing(LLMBackend):
+    name = "failing"
+
+    def chat(self, messages, model, temperature=0.6, max_tokens=900):
+        raise _RateLimited()
+
+
+def test_rate_limited_backend_penalizes_on_429():
+    limiter = RateLimiter(rpm=1000)
+    backend = RateLimitedBackend(_Failing(), limiter)
+    with pytest.raises(_RateLimited):
+        backend.chat([{"role": "user", "content": "hi"}], model="m")
+    with limiter._state.locked() as st:
+        assert st["blocked_until"] - time.time() > 6
+
+
+def test_wrapped_openai_backend_disables_sdk_retries():
+    from llm_backend import OpenAIBackend
+    backend = RateLimitedBackend(OpenAIBackend(api_key="test", base_url="http://127.0.0.1:9"), RateLimiter(rpm=10))
+    assert backend.inner.client.max_retries == 0
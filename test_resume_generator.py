@@ -0,0 +1,111 @@
+import time
+import threading
+
+import pytest
+
+import resume_generator as rg
+from llm_backend import LLMBackend, LocalBackend, RateLimitedBackend, set_backend
+from rate_limiter import RateLimiter, request_priority
+
+
+class _SlowBackend(LLMBackend):
+    """
+    Sleeps per model name, then answers with the model name.
+    """
+    name = "slow"
+
+    def __init__(self, delays, default=0.0):
+        self.delays = delays
+        self.default = default
+
+    def chat(self, messages, model, temperature=0.6, max_tokens=900):
+        time.sleep(self.delays.get(model, self.default))
+        return f"answer from {model}"
+
+
+MESSAGES = [{"role": "system", "content": "sys"}, {"role": "user", "content": "hi"}]
+
+
+@pytest.fixture(autouse=True)
+def _reset_backend(monkeypatch):
+    monkeypatch.setattr(rg, "_stage_latency", rg._StageLatency())
+    yield
+    set_backend(None)
+
+
+def test_deadline_bounds_a_slow_call():
+    set_backend(_SlowBackend({}, default=2.0))
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        rg._call_chat(MESSAGES, stage="test", deadline=time.monotonic() + 0.3)
+    assert time.monotonic() - start < 1.0
+
+
+def test_fast_call_within_deadline_returns_primary():
+    set_backend(_SlowBackend({}, default=0.0))
+    text = rg._call_chat(MESSAGES, model="primary", stage="test", deadline=time.monotonic() + 5)
+    assert text == "answer from primary"
+
+
+def test_hedge_wins_when_primary_is_slow(monkeypatch):
+    monkeypatch.setattr(rg, "HEDGE_ENABLED", True)
+    monkeypatch.setattr(rg, "HEDGE_DELAY_S", 0.1)
+    monkeypatch.setattr(rg, "HEDGE_MODEL", "hedge")
+    set_backend(_SlowBackend({"primary": 2.0, "hedge": 0.0}))
+    before = rg.get_hedge_stats()
+
+    start = time.monotonic()
+    text = rg._call_chat(MESSAGES, model="primary", stage="test")
+    assert text == "answer from hedge"
+    assert time.monotonic() - start < 1.0
+    after = rg.get_hedge_stats()
+    assert after["hedged"] == before["hedged"] + 1
+    assert after["hedge_wins"] == before["hedge_wins"] + 1
+
+
+def test_no_hedge_when_primary_answers_in_time(monkeypatch):
+    monkeypatch.setattr(rg, "HEDGE_ENABLED", True)
+    monkeypatch.setattr(rg, "HEDGE_DELAY_S", 1.0)
+    set_backend(_SlowBackend({}, default=0.0))
+    before = rg.get_hedge_stats()
+    assert rg._call_chat(MESSAGES, model="primary", stage="test") == "answer from primary"
+    assert rg.get_hedge_stats()["hedged"] == before["hedged"]
+
+
+def test_resume_stage_timeout_falls_back_to_local_assembly(monkeypatch):
+    monkeypatch.setattr(rg, "STAGE_BUDGETS", {"skills": 0.2, "enrich": 0.2, "resume": 0.3})
+    set_backend(_SlowBackend({}, default=3.0))
+    user = {"name": "Ana Lee", "email": "ana@example.com", "target_role": "Backend Engineer",
+            "skills": "Python, Django", "experience": "Acme – Engineer | 2020 – 2023\n- built APIs"}
+    start = time.monotonic()
+    text = rg.generate_resume(user)
+    assert time.monotonic() - start < 2.0
+    assert text.startswith("Ana Lee | Backend Engineer")
+    assert "## Professional Experience" in text
+
+
+def test_interactive_call_not_queued_behind_batch_calls():
+    limiter = RateLimiter(rpm=120)   # one request every 0.5 s
+    with limiter._state.locked() as st:
+        st["requests"] = 0.0
+        st["ts"] = time.time()
+    set_backend(RateLimitedBackend(LocalBackend(latency_ms=0, jitter_ms=0, error_rate=0), limiter))
+
+    def batch_call():
+        with request_priority("batch"):
+            try:
+                rg._call_chat(MESSAGES, max_retries=1, stage="test", deadline=time.monotonic() + 1.5)
+            except TimeoutError:
+                pass
+
+    threads = [threading.Thread(target=batch_call, daemon=True) for _ in range(20)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+
+    start = time.monotonic()
+    rg._call_chat(MESSAGES, stage="test", deadline=time.monotonic() + 5)
+    assert time.monotonic() - start < 1.0
+    assert limiter.stats()["interactive"]["acquired"] == 1
+    for t in threads:
+        t.join(5)
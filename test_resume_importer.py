@@ -0,0 +1,76 @@
+import io
+import zlib
+
+import pytest
+
+import resume_importer as ri
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import ArrayObject, DictionaryObject, NameObject, NumberObject, StreamObject
+
+
+def _stream(writer, data, filters, **extra):
+    s = StreamObject()
+    s._data = data
+    if filters:
+        s[NameObject("/Filter")] = ArrayObject([NameObject(f) for f in filters])
+    for key, value in extra.items():
+        s[NameObject("/" + key)] = value
+    return writer._add_object(s)
+
+
+def _pdf(content, filters, forms=None):
+    writer = PdfWriter()
+    page = writer.add_blank_page(300, 300)
+    page[NameObject("/Contents")] = _stream(writer, content, filters)
+    if forms:
+        xobjects = DictionaryObject()
+        for name, (data, form_filters) in forms.items():
+            xobjects[NameObject(name)] = _stream(
+                writer, data, form_filters, Type=NameObject("/XObject"), Subtype=NameObject("/Form"),
+                BBox=ArrayObject([NumberObject(0)] * 4))
+        page[NameObject("/Resources")] = DictionaryObject({NameObject("/XObject"): xobjects})
+    buf = io.BytesIO()
+    writer.write(buf)
+    return PdfReader(io.BytesIO(buf.getvalue())).pages[0]
+
+
+TEXT = b"BT /F1 12 Tf 10 10 Td (hello) Tj ET\n"
+
+
+@pytest.fixture(autouse=True)
+def _small_limit(monkeypatch):
+    monkeypatch.setattr(ri, "MAX_STREAM_BYTES", 64 * 1024)
+
+
+def test_plain_and_single_flate_pages_pass():
+    assert ri._content_within_limit(_pdf(TEXT, []))
+    assert ri._content_within_limit(_pdf(zlib.compress(TEXT), ["/FlateDecode"]))
+
+
+def test_chained_flate_bomb_rejected():
+    twice = zlib.compress(zlib.compress(TEXT * 100_000))
+    assert len(twice) < 4096
+    assert not ri._content_within_limit(_pdf(twice, ["/FlateDecode", "/FlateDecode"]))
+
+
+def test_bounded_filter_chain_decoded():
+    data = zlib.compress(TEXT).hex().encode() + b">"
+    assert ri._content_within_limit(_pdf(data, ["/ASCIIHexDecode", "/FlateDecode"]))
+
+
+def test_unknown_filter_rejected():
+    assert not ri._content_within_limit(_pdf(b"\x80", ["/LZWDecode"]))
+
+
+def test_form_xobject_bomb_rejected():
+    form = zlib.compress(TEXT * 100_000)
+    page = _pdf(b"q /Fm0 Do Q", [], forms={"/Fm0": (form, ["/FlateDecode"])})
+    assert not ri._content_within_limit(page)
+
+
+def test_form_xobject_charged_per_use():
+    form = TEXT * 100    # ~3.6 KB, drawn 50 times under an escaped name
+    page = _pdf(b"/F#6d0 Do\n" * 50, [], forms={"/Fm0": (form, [])})
+    assert not ri._content_within_limit(page)
+    page = _pdf(b"/Fm0 Do\n" * 5, [], forms={"/Fm0": (form, [])})
+    assert ri._content_within_limit(page)